@@ -1,26 +1,37 @@
 from typing import Dict, Any
 import logging
+import asyncio
 from app.models.state import RepoXState
 from app.graph.nodes.fetch_code import fetch_code
 from app.graph.nodes.parse_code_memory import parse_code_memory
-from app.graph.nodes.summarize_code import summarize_code_node
+from app.graph.nodes.summarize_code import summarize_files_async, apply_summary
 from app.graph.nodes.generate_readme import generate_readme
 from app.graph.nodes.visualize_code import visualize_code_node
 from app.graph.nodes.analyze_project import analyze_project_structure
-from app.graph.nodes.output_node import output_node
+from app.utils.llm_cache import get_cache
 
 logger = logging.getLogger(__name__)
 
+# Max number of per-file summaries in flight at once
+SUMMARY_CONCURRENCY = 16
 
-def summarize_only_node(state: RepoXState) -> RepoXState:
+
+async def summarize_only_node(state: RepoXState) -> RepoXState:
     repo_data = (state.parsed_data or {}).get("repo_path", {})
-    for file_path in repo_data.keys():
-        state.current_file_path = file_path
-        state = summarize_code_node(state)
+    if not state.preferences.generate_summary or not repo_data:
+        return state
+
+    # One semaphore bounds total in-flight calls; small files are batched
+    # many-per-call and big files fan out per chunk behind it.
+    sem = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+    for record in await summarize_files_async(repo_data, sem):
+        state = apply_summary(state, record)
+
     return state
 
 
-def run_pipeline(state: RepoXState) -> Dict[str, Any]:
+async def run_pipeline(state: RepoXState) -> Dict[str, Any]:
     """Run a simple sequential pipeline and return a dict matching API expectations."""
     logger.info("=" * 60)
     logger.info("🚀 Starting Documentation Generation Pipeline")
@@ -31,36 +42,50 @@ def run_pipeline(state: RepoXState) -> Dict[str, Any]:
     logger.info("📥 Step 1/5: Fetching code...")
     state = fetch_code(state)
     
+    # Short-circuit before any LLM work when fetch produced nothing -
+    # empty/invalid inputs (common on webhook retries) should not spend
+    # a full pipeline of LLM round-trips to produce an empty result.
+    if not state.files_content:
+        logger.warning("⚠️ No files fetched - skipping pipeline stages")
+        return state.to_api_dict()
+
     # 2) Parse code - ALWAYS use in-memory parser (no temp files!)
     logger.info("🔍 Step 2/5: Parsing code structure...")
-    if not hasattr(state, 'files_content') or not state.files_content:
-        raise RuntimeError(
-            "❌ ZERO STORAGE MODE ERROR: No in-memory files available!\n"
-            "files_content is required for zero-storage mode."
-        )
-    
     logger.info("   ✨ Using in-memory parser (ZERO disk usage!)")
     state = parse_code_memory(state)
-    
+
+    if not (state.parsed_data or {}).get("repo_path"):
+        logger.warning("⚠️ No parseable files found - skipping LLM stages")
+        return state.to_api_dict()
+
     # 3) Summarize (no inline comments/docstrings)
     logger.info("📝 Step 3/5: Generating code summaries with AI...")
-    state = summarize_only_node(state)
-    
-    # 4) Generate README
-    logger.info("📄 Step 4/5: Generating README with AI...")
-    state = generate_readme(state)
+    state = await summarize_only_node(state)
     
-    # 5) Visualize structure
-    logger.info("📊 Step 5/5: Creating visualizations...")
-    state = visualize_code_node(state)
-    
-    # 6) Analyze project structure
-    logger.info("📋 Step 6/6: Generating detailed project analysis...")
-    state = analyze_project_structure(state)
+    # 4-6) README, visualizations and per-file analysis.
+    # The README/visualization chain and the project analysis touch disjoint
+    # state attributes, so run them concurrently and merge afterwards.
+    # visualize_code_node reads state.readme, so it must follow generate_readme.
+    logger.info("📄 Steps 4-6/6: Generating README, visualizations and analysis concurrently...")
+
+    async def _readme_then_visualize(s: RepoXState) -> RepoXState:
+        s = await asyncio.to_thread(generate_readme, s)
+        return await visualize_code_node(s)
+
+    readme_state, analysis_state = await asyncio.gather(
+        _readme_then_visualize(state.model_copy()),
+        analyze_project_structure(state.model_copy()),
+    )
+
+    state.readme = readme_state.readme
+    state.visuals = readme_state.visuals
+    state.project_analysis = analysis_state.project_analysis
     
     # 7) Final output processing
     logger.info("✅ Final: Processing output...")
     
+    get_cache().log_stats()
+
     logger.info("=" * 60)
     logger.info("✨ Documentation Generation Complete!")
     logger.info("🔒 ZERO files stored locally - all processing done in memory")
@@ -68,12 +93,4 @@ def run_pipeline(state: RepoXState) -> Dict[str, Any]:
     logger.info("=" * 60)
 
     # Return the data from state object
-    return {
-        "readme": state.readme or "",
-        "summaries": state.summaries or {},
-        "modified_files": state.modified_files or {},
-        "visuals": state.visuals or {},
-        "folder_tree": {},  # No local paths to expose
-        "input_type": state.input_type,
-        "project_analysis": state.project_analysis,
-    }
\ No newline at end of file
+    return state.to_api_dict()
\ No newline at end of file
@@ -2,77 +2,200 @@
 Project Analysis Node - Generates detailed file-by-file analysis with function highlights
 """
 from app.models.state import RepoXState
-from app.utils.mistral import get_llm_response_summary
+from app.utils.mistral import (
+    get_llm_response_summary,
+    get_llm_response_summary_async,
+    get_llm_response_summary_stream,
+)
+from app.utils.llm_cache import get_cache, json_dumps, json_loads
+from app.utils.rate_limit import get_limiter, estimate_tokens
+import asyncio
+import hashlib
+import logging
+import os
+import re
 import time
 import random
 
+logger = logging.getLogger(__name__)
+
+# Max number of LLM calls in flight at once; tunable via env so the cap can
+# be matched to the provider's RPM tier without a code change
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "8"))
+
+# Private RNG instance skips the lock on the module-level random functions;
+# backoff multipliers are precomputed instead of 2 ** attempt per retry
+_RNG = random.Random()
+_BACKOFFS = (1, 2, 4, 8, 16)
+
+# Batch up to this many files into one LLM call, bounded by a code budget so
+# batched prompts stay inside the model's context window
+ANALYSIS_BATCH_SIZE = 5
+ANALYSIS_BATCH_CODE_BUDGET = 12000
+
+_FILE_BLOCK_RE = re.compile(r"===FILE:\s*(.+?)\s*===\s*(.*?)(?:===END===|(?====FILE:)|\Z)", re.DOTALL)
+
+# Eligibility constants, hoisted out of the per-file loop:
+# non-code languages, exact config/build filenames, and substring/suffix
+# patterns folded into one compiled alternation
+_SKIP_LANGS = frozenset({"css", "scss", "sass", "less", "html", "json", "yaml", "yml"})
+_SKIP_EXACT = frozenset({"package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml"})
+_SKIP_NAME_RE = re.compile(r"tsconfig|webpack|vite\.config|babel|eslint|\.lock$|\.min\.js$|\.bundle\.js$")
+
+# Stylesheet languages excluded from the reported language list
+_LANG_EXCLUDE = frozenset({"css", "scss", "sass", "less"})
+
+# Token budget for code embedded in analysis prompts; the head keeps
+# imports/module docstrings, the rest goes to the definition-dense tail
+PROMPT_CODE_TOKENS = 1200
+PROMPT_HEAD_TOKENS = 200
+
+# tiktoken is optional - fall back to a ~4 chars/token heuristic without it
+try:
+    import tiktoken  # type: ignore
+    _ENCODER = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODER = None
+
+
+# Comment removal upstream leaves runs of blank lines and trailing spaces;
+# collapsing them is pure token savings with no signal lost
+_TRAILING_WS_RE = re.compile(r"[ \t]+\n")
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+
+def compress_code(code: str) -> str:
+    """Cheap local token reduction before prompt truncation.
+
+    The parser already strips comments with tree-sitter, so what remains to
+    reclaim is whitespace: trailing spaces and the blank-line runs left where
+    comment blocks used to be. Typically recovers 10-30% of the code budget
+    on comment-heavy files.
+    """
+    code = _TRAILING_WS_RE.sub("\n", code)
+    return _BLANK_RUN_RE.sub("\n\n", code)
+
+
+def smart_truncate(code: str, max_tokens: int = PROMPT_CODE_TOKENS,
+                   head_tokens: int = PROMPT_HEAD_TOKENS) -> str:
+    """Truncate code on token boundaries instead of a blind character slice.
+
+    Keeps the first head_tokens (imports, module docstring) plus the tail of
+    the budget (where definitions typically cluster), joined by a marker, so
+    the LLM never sees a mid-sequence cut or loses the last function.
+    """
+    code = compress_code(code)
+    if _ENCODER is not None:
+        tokens = _ENCODER.encode(code)
+        if len(tokens) <= max_tokens:
+            return code
+        head = _ENCODER.decode(tokens[:head_tokens])
+        tail = _ENCODER.decode(tokens[-(max_tokens - head_tokens):])
+    else:
+        max_chars = max_tokens * 4
+        if len(code) <= max_chars:
+            return code
+        head_chars = head_tokens * 4
+        head = code[:head_chars]
+        tail = code[-(max_chars - head_chars):]
+
+    return f"{head}\n# ... [truncated] ...\n{tail}"
+
+
+# Proactive limiter sized to the provider quota; tune per plan via
+# ANALYSIS_RPM / ANALYSIS_TPM env vars
+_LIMITER = get_limiter("analysis")
+
+
+# Response fields announced as they arrive over the stream
+_STREAM_PROGRESS_MARKERS = ('"purpose"', '"functions"', '"key_details"')
+
+
+def _consume_stream(prompt: str, language: str) -> str:
+    """Consume the streaming API, logging section headers as they arrive."""
+    parts = []
+    tail = ""
+    announced = set()
+    for chunk in get_llm_response_summary_stream(prompt=prompt, language=language):
+        parts.append(chunk)
+        # Running suffix match - headers are short, so a small window suffices
+        tail = (tail + chunk)[-64:]
+        for marker in _STREAM_PROGRESS_MARKERS:
+            if marker not in announced and marker in tail:
+                announced.add(marker)
+                logger.debug("[STREAM] Receiving %s section...", marker.strip('"'))
+    return "".join(parts).strip()
+
 
 def safe_llm_call(prompt: str, language: str, max_retries=5, base_wait=2.0):
+    cache = get_cache()
+    key = cache.make_key(prompt, language, model="summary")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    wait = _LIMITER.reserve(estimate_tokens(prompt))
+    if wait > 0:
+        time.sleep(wait)
+
+    # First attempt streams so progress overlaps network time;
+    # on any failure fall back to the plain retry loop below.
+    try:
+        response = _consume_stream(prompt, language)
+        if response:
+            cache.set(key, response)
+            return response
+    except Exception as e:
+        logger.warning("[STREAM] Streaming failed (%s); falling back to non-streaming", e)
+
     for attempt in range(max_retries):
         try:
-            return get_llm_response_summary(prompt=prompt, language=language).strip()
+            response = get_llm_response_summary(prompt=prompt, language=language).strip()
+            cache.set(key, response)
+            return response
         except Exception as e:
-            wait_time = base_wait * (2 ** attempt) + random.uniform(0, 1)
-            print(f"[Retry] LLM call failed on attempt {attempt+1}: {e}. Retrying in {wait_time:.1f}s...")
+            wait_time = base_wait * _BACKOFFS[min(attempt, len(_BACKOFFS) - 1)] + _RNG.random()
+            logger.warning("[Retry] LLM call failed on attempt %d: %s. Retrying in %.1fs...",
+                           attempt + 1, e, wait_time)
             time.sleep(wait_time)
     raise RuntimeError("LLM call failed after maximum retries.")
 
 
-def analyze_project_structure(state: RepoXState) -> RepoXState:
-    """
-    Generate enhanced project analysis with:
-    - Project structure tree
-    - Detailed file summaries with function highlights
-    """
-    if not state.parsed_data:
-        return state
-    
-    repo_data = state.parsed_data.get("repo_path", {})
-    if not repo_data:
-        return state
-    
-    # Generate detailed analysis for each file
-    file_paths = sorted(repo_data.keys())
-    detailed_analysis = {}
-    
-    for file_path, file_info in repo_data.items():
+async def safe_llm_call_async(prompt: str, language: str, max_retries=5, base_wait=2.0):
+    cache = get_cache()
+    key = cache.make_key(prompt, language, model="summary")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    wait = _LIMITER.reserve(estimate_tokens(prompt))
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+    try:
+        response = await asyncio.to_thread(_consume_stream, prompt, language)
+        if response:
+            cache.set(key, response)
+            return response
+    except Exception as e:
+        logger.warning("[STREAM] Streaming failed (%s); falling back to non-streaming", e)
+
+    for attempt in range(max_retries):
         try:
-            code = file_info.get("code", "")
-            language = file_info.get("type", "unknown")
-            symbols = file_info.get("contains", [])
-            
-            # Skip non-code files (CSS, HTML, JSON, config files)
-            if language in ("css", "scss", "sass", "less", "html", "json", "yaml", "yml"):
-                print(f"[SKIP] Skipping non-code file ({language}): {file_path}")
-                continue
-            
-            # Skip files with no meaningful code content
-            if not code.strip() or len(code.strip()) < 50:
-                print(f"[SKIP] Skipping empty/minimal file: {file_path}")
-                continue
-            
-            # Skip files with no detected functions/classes (likely just config or data)
-            if not symbols or len(symbols) == 0:
-                print(f"[SKIP] Skipping file with no functions/classes: {file_path}")
-                continue
-            
-            # Skip common config/build files by name
-            filename = file_path.split('/')[-1].lower()
-            skip_patterns = [
-                'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
-                'tsconfig', 'webpack', 'vite.config', 'babel', 'eslint',
-                '.lock', '.min.js', '.bundle.js'
-            ]
-            if any(pattern in filename for pattern in skip_patterns):
-                print(f"[SKIP] Skipping config/build file: {file_path}")
-                continue
-            
-            # Create enhanced prompt for detailed analysis with Google-style documentation
-            prompt = f"""You are a senior software engineer writing technical documentation following Google's documentation style guide.
+            response = await get_llm_response_summary_async(prompt=prompt, language=language)
+            response = response.strip()
+            cache.set(key, response)
+            return response
+        except Exception as e:
+            wait_time = base_wait * _BACKOFFS[min(attempt, len(_BACKOFFS) - 1)] + _RNG.random()
+            logger.warning("[Retry] LLM call failed on attempt %d: %s. Retrying in %.1fs...",
+                           attempt + 1, e, wait_time)
+            await asyncio.sleep(wait_time)
+    raise RuntimeError("LLM call failed after maximum retries.")
 
-Analyze this {language} file and provide clear, professional documentation in the following format:
 
-**PURPOSE:**
+# Documentation format shared by the single-file and batched analysis prompts
+_DOC_FORMAT_RULES = """**PURPOSE:**
 Write 2-3 sentences in ACTIVE VOICE explaining:
 1. What this file DOES (its primary function)
 2. How it FITS into the overall application architecture
@@ -113,46 +236,320 @@ CRITICAL RULES:
 ✓ It's OK to have NO functions listed if none meet the quality bar
 ✓ Better to have empty sections than vague, useless descriptions
 
+OUTPUT FORMAT:
+Respond ONLY with a JSON object matching this schema, with no markdown wrapper:
+{"purpose": "<PURPOSE text>", "functions": ["<one entry per documented function>"], "key_details": ["<one entry per technical detail>"]}
+Apply all of the rules above when writing the values."""
+
+
+# Bump whenever the analysis prompt templates change so stale cached
+# records written under the old wording are not served for new runs
+_PROMPT_VERSION = "v2"
+
+
+def _file_cache_key(code: str, language: str) -> str:
+    """Content-addressed cache key for a whole-file analysis record.
+
+    BLAKE2b is faster than SHA-256 and 16 bytes is plenty for dedup here.
+    """
+    digest = hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+    return f"file-analysis:{_PROMPT_VERSION}:{digest}:{language}"
+
+
+# Full prompt templates are composed once at import; per call we only fill in
+# the dynamic fields instead of rebuilding the multi-KB static text
+_SOLO_PROMPT_TEMPLATE = f"""You are a senior software engineer writing technical documentation following Google's documentation style guide.
+
+Analyze this {{language}} file and provide clear, professional documentation in the following format:
+
+{_DOC_FORMAT_RULES}
+
 Code to analyze:
-```{language}
-{code[:4000]}  # Increased limit for better analysis
+```{{language}}
+{{code}}
 ```
 
-Detected functions/classes: {', '.join(symbols[:10]) if symbols else 'None'}
+Detected functions/classes: {{symbols}}
 """
-            
-            response = safe_llm_call(prompt, language)
-            
-            # Parse the response
-            parsed = parse_analysis_response(response, symbols)
-            detailed_analysis[file_path] = {
+
+_BATCH_PROMPT_TEMPLATE = f"""You are a senior software engineer writing technical documentation following Google's documentation style guide.
+
+Analyze EACH of the following {{language}} files. For every file, emit one block that:
+1. Starts with the exact delimiter line `===FILE: <path>===`, echoing the path shown below
+2. Contains the documentation in the format described next
+3. Ends with the exact delimiter line `===END===`
+
+Document each file in the following format:
+
+{_DOC_FORMAT_RULES}
+
+Files to analyze:
+
+{{files_section}}
+"""
+
+
+def build_analysis_prompt(code: str, language: str, symbols: list) -> str:
+    """Build the per-file analysis prompt with Google-style documentation rules"""
+    return _SOLO_PROMPT_TEMPLATE.format(
+        language=language,
+        code=smart_truncate(code),
+        symbols=', '.join(symbols[:10]) if symbols else 'None'
+    )
+
+
+def build_batch_analysis_prompt(language: str, entries: list) -> str:
+    """Build one prompt covering several files of the same language.
+
+    entries is a list of (file_path, code, symbols) tuples. Batching
+    amortizes the per-call round trip and the shared format instructions
+    across files instead of repeating them per call.
+    """
+    file_blocks = []
+    for file_path, code, symbols in entries:
+        file_blocks.append(
+            f"===FILE: {file_path}===\n"
+            f"```{language}\n"
+            f"{smart_truncate(code)}\n"
+            f"```\n"
+            f"Detected functions/classes: {', '.join(symbols[:10]) if symbols else 'None'}"
+        )
+
+    files_section = "\n\n".join(file_blocks)
+
+    return _BATCH_PROMPT_TEMPLATE.format(
+        language=language,
+        files_section=files_section
+    )
+
+
+def parse_analysis_payload(text: str, symbols: list) -> dict:
+    """Decode the model's JSON analysis into the detailed_analysis shape.
+
+    JSON mode removes the markdown section parsing on the happy path; the
+    legacy parser stays as a safety net for models that ignore the output
+    format instruction.
+    """
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = re.sub(r"^```(?:json)?\n?", "", cleaned)
+        cleaned = re.sub(r"\n?```$", "", cleaned).strip()
+
+    try:
+        data = json_loads(cleaned)
+    except Exception:
+        return parse_analysis_response(text, symbols)
+
+    if not isinstance(data, dict):
+        return parse_analysis_response(text, symbols)
+
+    purpose = str(data.get("purpose") or "").strip()
+    if not purpose:
+        purpose = "This file is part of the application codebase."
+
+    return {
+        "summary": purpose,
+        "purpose": purpose,
+        "functions": [str(f) for f in data.get("functions") or []],
+        "key_details": [str(d) for d in data.get("key_details") or []],
+    }
+
+
+def split_batch_response(response: str) -> dict:
+    """Split a batched LLM response into per-file sections keyed by path."""
+    sections = {}
+    for match in _FILE_BLOCK_RE.finditer(response):
+        file_path = match.group(1).strip().strip('`')
+        sections[file_path] = match.group(2).strip()
+    return sections
+
+
+async def analyze_project_structure(state: RepoXState) -> RepoXState:
+    """
+    Generate enhanced project analysis with:
+    - Project structure tree
+    - Detailed file summaries with function highlights
+
+    Per-file LLM calls are I/O-bound, so they are dispatched concurrently
+    with a bounded semaphore instead of one blocking call per file.
+    """
+    if not state.parsed_data:
+        return state
+
+    repo_data = state.parsed_data.get("repo_path", {})
+    if not repo_data:
+        return state
+
+    # Generate detailed analysis for each file
+    total_files = len(repo_data)
+    detailed_analysis = {}
+
+    cache = get_cache()
+
+    # Eligibility checks stay synchronous and run before any LLM work
+    eligible = []
+    cache_keys = {}
+    duplicates = {}   # representative path -> paths sharing identical content
+    seen_content = {}  # cache key -> representative path
+    skipped = 0
+    for file_path, file_info in repo_data.items():
+        code = file_info.get("code", "")
+        language = file_info.get("type", "unknown")
+        symbols = file_info.get("contains", [])
+
+        # Skip non-code files (CSS, HTML, JSON, config files)
+        if language in _SKIP_LANGS:
+            logger.debug("[SKIP] Skipping non-code file (%s): %s", language, file_path)
+            skipped += 1
+            continue
+
+        # Skip files with no meaningful code content
+        if len(code.strip()) < 50:
+            logger.debug("[SKIP] Skipping empty/minimal file: %s", file_path)
+            skipped += 1
+            continue
+
+        # Skip files with no detected functions/classes (likely just config or data)
+        if not symbols:
+            logger.debug("[SKIP] Skipping file with no functions/classes: %s", file_path)
+            skipped += 1
+            continue
+
+        # Skip common config/build files by name
+        filename = file_path.rpartition('/')[2].lower()
+        if filename in _SKIP_EXACT or _SKIP_NAME_RE.search(filename):
+            logger.debug("[SKIP] Skipping config/build file: %s", file_path)
+            skipped += 1
+            continue
+
+        # Content-hash short-circuit: identical code was already analyzed
+        # on a previous run, so reuse the stored record with zero LLM calls
+        cache_key = _file_cache_key(code, language)
+        cached_record = cache.get(cache_key)
+        if cached_record is not None:
+            try:
+                detailed_analysis[file_path] = json_loads(cached_record)
+                continue
+            except (ValueError, TypeError):
+                pass  # corrupt entry - fall through and re-analyze
+
+        # Identical content elsewhere in the repo (stubs, generated code,
+        # copy-paste) shares one LLM call; the result is broadcast after
+        rep = seen_content.get(cache_key)
+        if rep is not None:
+            duplicates.setdefault(rep, []).append(file_path)
+            continue
+        seen_content[cache_key] = file_path
+
+        # Carry the unpacked fields forward so the batching stage never
+        # repeats these dict lookups
+        cache_keys[file_path] = cache_key
+        eligible.append((file_path, code, language, symbols))
+
+    logger.info("[ANALYSIS] %d of %d files eligible for analysis (%d cached/deduped, %d skipped)",
+                len(eligible), total_files,
+                total_files - skipped - len(eligible), skipped)
+
+    # Group per language so each batched prompt keeps an accurate code fence,
+    # then chunk into batches bounded by file count and code budget
+    by_language = {}
+    for file_path, code, language, symbols in eligible:
+        by_language.setdefault(language, []).append((file_path, code, symbols))
+
+    batches = []
+    for language, files in by_language.items():
+        batch = []
+        budget = 0
+        for entry in files:
+            code_len = min(len(entry[1]), PROMPT_CODE_TOKENS * 4)
+            if batch and (len(batch) >= ANALYSIS_BATCH_SIZE or budget + code_len > ANALYSIS_BATCH_CODE_BUDGET):
+                batches.append((language, batch))
+                batch = []
+                budget = 0
+            batch.append(entry)
+            budget += code_len
+        if batch:
+            batches.append((language, batch))
+
+    sem = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+
+    async def _analyze_batch(language: str, files: list) -> dict:
+        prompt = build_batch_analysis_prompt(language, files)
+
+        async with sem:
+            response = await safe_llm_call_async(prompt, language)
+
+        sections = split_batch_response(response)
+        analyzed = {}
+        for file_path, code, symbols in files:
+            section = sections.get(file_path)
+            if section is None:
+                # LLM dropped this file from the batch - retry it solo
+                logger.info("[ANALYSIS] Batch response missing %s, retrying solo", file_path)
+                solo_prompt = build_analysis_prompt(code, language, symbols)
+                async with sem:
+                    section = await safe_llm_call_async(solo_prompt, language)
+
+            parsed = parse_analysis_payload(section, symbols)
+            record = {
                 **parsed,
                 "language": language,
                 "symbols": symbols
             }
-            
-        except Exception as e:
-            print(f"[Error] Failed analyzing {file_path}: {e}")
-            detailed_analysis[file_path] = {
-                "summary": "Analysis failed",
-                "purpose": f"Error: {str(e)}",
-                "functions": [],
-                "key_details": []
-            }
-    
+            analyzed[file_path] = record
+            cache.set(cache_keys[file_path], json_dumps(record))
+        return analyzed
+
+    tasks = [_analyze_batch(lang, files) for lang, files in batches]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for (language, files), result in zip(batches, results):
+        if isinstance(result, BaseException):
+            for file_path, _, _ in files:
+                logger.error("[Error] Failed analyzing %s: %s", file_path, result)
+                detailed_analysis[file_path] = {
+                    "summary": "Analysis failed",
+                    "purpose": f"Error: {str(result)}",
+                    "functions": [],
+                    "key_details": []
+                }
+        else:
+            detailed_analysis.update(result)
+
+    # Broadcast each representative's record to its identical-content twins
+    for rep, twins in duplicates.items():
+        record = detailed_analysis.get(rep)
+        if record is not None:
+            for twin in twins:
+                detailed_analysis[twin] = dict(record)
+
     # Store in state (no structure_tree - user doesn't want it)
     state.project_analysis = {
         "detailed_analysis": detailed_analysis,
         "file_count": len(detailed_analysis),  # Count only analyzed files
-        "total_files": len(file_paths),  # Total files in repo
-        "languages": list(set(info.get("type", "unknown") for info in repo_data.values() if info.get("type") not in ["css", "scss", "sass", "less"]))
+        "total_files": total_files,  # Total files in repo
+        "languages": list({
+            t for t in (info.get("type", "unknown") for info in repo_data.values())
+            if t not in _LANG_EXCLUDE
+        })
     }
-    
-    print(f"[ANALYSIS] Analyzed {len(detailed_analysis)} files out of {len(file_paths)} total files")
-    
+
+    logger.info("[ANALYSIS] Analyzed %d files out of %d total (%d skipped)",
+                len(detailed_analysis), total_files, skipped)
+
     return state
 
 
+# Single pass over the response capturing (header, body) pairs; body runs
+# until the next ALL-CAPS section header or end of text
+_SECTION_RE = re.compile(
+    r"\*\*(PURPOSE|KEY FUNCTIONS(?:\s*&\s*COMPONENTS)?|TECHNICAL DETAILS):\*\*\s*"
+    r"(.*?)(?=\*\*[A-Z][A-Z &]+:\*\*|\Z)",
+    re.DOTALL | re.IGNORECASE
+)
+_BULLET_RE = re.compile(r"^\s*[\-\*]+\s*(.+?)\s*$", re.MULTILINE)
+
+
 def parse_analysis_response(response: str, symbols: list) -> dict:
     """
     Parse the LLM response into structured data
@@ -163,62 +560,27 @@ def parse_analysis_response(response: str, symbols: list) -> dict:
         "functions": [],
         "key_details": []
     }
-    
-    # Split by sections
-    sections = response.split("**")
-    
-    for i in range(len(sections)):
-        section = sections[i].strip()
-        
-        if section.upper().startswith("PURPOSE:"):
-            content = section.replace("PURPOSE:", "").strip()
-            if i + 1 < len(sections):
-                content = content.split("**")[0].strip()
-            result["purpose"] = content
-            result["summary"] = content  # Use purpose as summary
-            
-        elif section.upper().startswith("KEY FUNCTIONS:"):
-            # Get content after this marker
-            if i + 1 < len(sections):
-                func_content = sections[i + 1] if i + 1 < len(sections) else ""
-                # Look for next ** marker
-                func_content = func_content.split("**")[0] if "**" in func_content else func_content
-            else:
-                func_content = section.replace("KEY FUNCTIONS:", "").strip()
-            
-            # Parse function lines
-            lines = func_content.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if line.startswith('-') or line.startswith('*'):
-                    # Remove leading markers
-                    line = line.lstrip('-*').strip()
-                    if line:
-                        result["functions"].append(line)
-            
-        elif section.upper().startswith("TECHNICAL DETAILS:"):
-            # Get content after this marker
-            if i + 1 < len(sections):
-                detail_content = sections[i + 1] if i + 1 < len(sections) else ""
-                detail_content = detail_content.split("**")[0] if "**" in detail_content else detail_content
-            else:
-                detail_content = section.replace("TECHNICAL DETAILS:", "").strip()
-            
-            # Parse detail lines
-            lines = detail_content.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if line.startswith('-') or line.startswith('*'):
-                    line = line.lstrip('-*').strip()
-                    if line:
-                        result["key_details"].append(line)
-    
+
+    for match in _SECTION_RE.finditer(response):
+        header = match.group(1).upper()
+        body = match.group(2).strip()
+
+        if header == "PURPOSE":
+            result["purpose"] = body
+            result["summary"] = body  # Use purpose as summary
+
+        elif header.startswith("KEY FUNCTIONS"):
+            result["functions"].extend(_BULLET_RE.findall(body))
+
+        elif header == "TECHNICAL DETAILS":
+            result["key_details"].extend(_BULLET_RE.findall(body))
+
     # NO fallback for functions - if LLM couldn't explain them meaningfully, don't list them
     # This ensures we only show functions with proper explanations
-    
+
     # Fallback: if no purpose, use generic
     if not result["purpose"]:
         result["purpose"] = "This file is part of the application codebase."
         result["summary"] = result["purpose"]
-    
+
     return result
@@ -1,11 +1,19 @@
 import os
 import logging
-from git import Repo, GitCommandError
+import subprocess
 from app.models.state import RepoXState
 
 logger = logging.getLogger(__name__)
 
 
+def _git(repo_path: str, *args: str) -> subprocess.CompletedProcess:
+    """Run one git command against repo_path, raising on failure."""
+    return subprocess.run(
+        ["git", "-C", repo_path, *args],
+        check=True, capture_output=True, text=True
+    )
+
+
 def commit_and_push_readme(state: RepoXState) -> RepoXState:
     """
     Commits the generated README.md to the cloned repository and pushes it to GitHub.
@@ -50,9 +58,6 @@ def commit_and_push_readme(state: RepoXState) -> RepoXState:
         return state
     
     try:
-        logger.info(f"[COMMIT] Opening repository at: {repo_path}")
-        repo = Repo(repo_path)
-        
         # Write README.md to the repository
         readme_path = os.path.join(repo_path, "README.md")
         logger.info(f"[COMMIT] Writing README to: {readme_path}")
@@ -61,25 +66,18 @@ def commit_and_push_readme(state: RepoXState) -> RepoXState:
             f.write(state.readme)
         
         # Check if there are changes to commit
-        if repo.is_dirty(untracked_files=True):
-            # Add README.md
-            repo.index.add(["README.md"])
+        status = _git(repo_path, "status", "--porcelain", "--", "README.md")
+        if status.stdout.strip():
+            _git(repo_path, "add", "README.md")
             
-            # Commit
             commit_message = "docs: Auto-generate README.md with RepoX"
             logger.info(f"[COMMIT] Committing with message: {commit_message}")
-            repo.index.commit(commit_message)
+            _git(repo_path, "commit", "-m", commit_message)
             
-            # Push to remote
-            logger.info("[COMMIT] Pushing to remote repository...")
-            origin = repo.remote(name='origin')
-            
-            # Get current branch
-            current_branch = repo.active_branch.name
+            # Push to remote on the current branch
+            current_branch = _git(repo_path, "rev-parse", "--abbrev-ref", "HEAD").stdout.strip()
             logger.info(f"[COMMIT] Pushing to branch: {current_branch}")
-            
-            # Push
-            origin.push(refspec=f'{current_branch}:{current_branch}')
+            _git(repo_path, "push", "origin", f"{current_branch}:{current_branch}")
             
             logger.info("[COMMIT] ✓ Successfully pushed README.md to GitHub!")
             state.commit_status = "success"
@@ -90,14 +88,15 @@ def commit_and_push_readme(state: RepoXState) -> RepoXState:
             state.commit_status = "no_changes"
             state.commit_message = "README.md already exists and is up to date"
             
-    except GitCommandError as e:
-        error_msg = f"Git error: {str(e)}"
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or "").strip()
+        error_msg = f"Git error: {stderr or e}"
         logger.error(f"[COMMIT] {error_msg}")
         state.commit_status = "error"
         state.commit_message = error_msg
         
         # Check if it's an authentication issue
-        if "authentication" in str(e).lower() or "permission" in str(e).lower():
+        if "authentication" in stderr.lower() or "permission" in stderr.lower():
             state.commit_message = "Authentication required - please configure Git credentials or use HTTPS with token"
             
     except Exception as e:
@@ -1,45 +1,154 @@
 import logging
+import os
 import zipfile
 import io
+from concurrent.futures import ThreadPoolExecutor
 from app.models.state import RepoXState
 from app.utils.github_api import download_repo_to_memory
 
 logger = logging.getLogger(__name__)
 
+# Entries larger than this are skipped before any decompression happens
+MAX_FILE_BYTES = 2_000_000
+
+# Below this many entries a thread pool costs more than it saves
+_PARALLEL_MIN_FILES = 8
+
+# Known-binary extensions, skipped without decompressing the entry at all
+BINARY_EXTS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp",
+    ".woff", ".woff2", ".ttf", ".eot", ".otf",
+    ".zip", ".gz", ".tar", ".rar", ".7z",
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx",
+    ".exe", ".dll", ".so", ".dylib", ".pyc", ".class", ".jar",
+    ".mp3", ".mp4", ".avi", ".mov", ".wav",
+)
+
+
+def _decode_entry(zip_file: zipfile.ZipFile, file_info: zipfile.ZipInfo):
+    """Decode one ZIP entry to text, or None if it is binary/unreadable."""
+    try:
+        # Stream-decode through TextIOWrapper so the intermediate
+        # bytes buffer never coexists with the decoded string
+        with zip_file.open(file_info) as raw:
+            return io.TextIOWrapper(raw, encoding='utf-8', errors='strict').read()
+    except UnicodeDecodeError:
+        # Skip binary files
+        logger.debug(f"Skipping binary file: {file_info.filename}")
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to read {file_info.filename}: {e}")
+        return None
+
+
+def _decode_chunk(zip_data: bytes, names: list) -> dict:
+    """Decode a slice of entries with a private ZipFile.
+
+    ZipFile reads are not thread-safe, so each worker opens its own handle
+    over the shared bytes buffer (cheap - only the central directory is
+    re-parsed, not the data).
+    """
+    decoded = {}
+    with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_file:
+        for name in names:
+            text = _decode_entry(zip_file, zip_file.getinfo(name))
+            if text is not None:
+                decoded[name] = text
+    return decoded
+
+
 def extract_zip_to_memory(zip_data: bytes) -> dict:
     """
     Extract ZIP file contents directly to memory (no temp files).
-    
+
     Args:
         zip_data: Raw bytes of the ZIP file
-        
+
     Returns:
         Dictionary mapping file paths to their contents
     """
     files_content = {}
-    
+
     with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_file:
+        eligible = []
         for file_info in zip_file.filelist:
             # Skip directories
             if file_info.is_dir():
                 continue
-            
-            try:
-                # Read file content
-                content = zip_file.read(file_info.filename).decode('utf-8')
-                files_content[file_info.filename] = content
-            except UnicodeDecodeError:
-                # Skip binary files
+
+            # Cheap metadata checks first - obvious binaries and oversized
+            # entries are rejected before spending any decompression work
+            if file_info.filename.lower().endswith(BINARY_EXTS):
                 logger.debug(f"Skipping binary file: {file_info.filename}")
                 continue
-            except Exception as e:
-                logger.warning(f"Failed to read {file_info.filename}: {e}")
+            if file_info.file_size > MAX_FILE_BYTES:
+                logger.debug(f"Skipping oversized file ({file_info.file_size} bytes): {file_info.filename}")
                 continue
-    
+
+            eligible.append(file_info)
+
+        if len(eligible) < _PARALLEL_MIN_FILES:
+            for file_info in eligible:
+                text = _decode_entry(zip_file, file_info)
+                if text is not None:
+                    files_content[file_info.filename] = text
+        else:
+            # zlib releases the GIL during decompression, so threads give
+            # near-linear speedup on multi-file archives
+            workers = min(os.cpu_count() or 1, 8)
+            chunks = [[info.filename for info in eligible[i::workers]] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for decoded in executor.map(_decode_chunk, [zip_data] * len(chunks), chunks):
+                    files_content.update(decoded)
+
     logger.info(f"✓ Extracted {len(files_content)} text files from ZIP to memory")
     return files_content
 
 
+def _fetch_github(state: RepoXState) -> None:
+    """GitHub repository - downloaded directly to memory via the API."""
+    logger.info(f"[FETCH] Fetching GitHub repo: {state.input_data}")
+    logger.info("[FETCH] 🚀 Using GitHub API with in-memory storage")
+    
+    branch = state.branch if state.branch else "main"
+    files_content = download_repo_to_memory(state.input_data, branch=branch)
+    state.files_content = files_content
+    logger.info(f"[FETCH] ✅ Loaded {len(files_content)} files into memory (ZERO disk usage!)")
+
+
+def _fetch_zip(state: RepoXState) -> None:
+    """ZIP file upload - extracted in memory, raw bytes or base64 string."""
+    logger.info("[FETCH] 🚀 Extracting ZIP to memory (no temp files!)")
+    
+    if isinstance(state.input_data, str):
+        import base64
+        zip_bytes = base64.b64decode(state.input_data)
+    else:
+        zip_bytes = state.input_data
+    
+    files_content = extract_zip_to_memory(zip_bytes)
+    state.files_content = files_content
+    logger.info(f"[FETCH] ✅ Extracted {len(files_content)} files to memory (ZERO disk usage!)")
+
+
+def _fetch_upload(state: RepoXState) -> None:
+    """Direct upload - input_data is already a dict of file contents."""
+    logger.info("[FETCH] ✅ Using uploaded data (already in memory)")
+    if isinstance(state.input_data, dict):
+        state.files_content = state.input_data
+    else:
+        raise ValueError("Upload input_data must be a dictionary of file contents")
+
+
+# input_type aliases collapse onto one canonical key per source backend
+_INPUT_ALIASES = {"repo": "github", "url": "github"}
+_FETCHERS = {
+    "github": _fetch_github,
+    "zip": _fetch_zip,
+    "upload": _fetch_upload,
+}
+
+
 def fetch_code(state: RepoXState) -> RepoXState:
     """
     Fetch code from GitHub or ZIP - ZERO local storage mode!
@@ -49,46 +158,14 @@ def fetch_code(state: RepoXState) -> RepoXState:
         logger.info(f"[FETCH] Input type: {state.input_type}")
         logger.info(f"[FETCH] 🔒 ZERO LOCAL STORAGE MODE - All in-memory processing")
 
-        # GitHub repository
-        if state.input_type in ("github", "repo", "url"):
-            logger.info(f"[FETCH] Fetching GitHub repo: {state.input_data}")
-            logger.info("[FETCH] 🚀 Using GitHub API with in-memory storage")
-            
-            # Download directly to memory via GitHub API
-            branch = state.branch if state.branch else "main"
-            files_content = download_repo_to_memory(state.input_data, branch=branch)
-            state.files_content = files_content
-            logger.info(f"[FETCH] ✅ Loaded {len(files_content)} files into memory (ZERO disk usage!)")
-            
-        # ZIP file upload
-        elif state.input_type == "zip":
-            logger.info("[FETCH] 🚀 Extracting ZIP to memory (no temp files!)")
-            
-            # Assuming input_data is raw bytes or base64 string
-            if isinstance(state.input_data, str):
-                import base64
-                zip_bytes = base64.b64decode(state.input_data)
-            else:
-                zip_bytes = state.input_data
-            
-            files_content = extract_zip_to_memory(zip_bytes)
-            state.files_content = files_content
-            logger.info(f"[FETCH] ✅ Extracted {len(files_content)} files to memory (ZERO disk usage!)")
-            
-        # Direct upload (already in memory)
-        elif state.input_type == "upload":
-            logger.info("[FETCH] ✅ Using uploaded data (already in memory)")
-            # Assume input_data is already a dict of files
-            if isinstance(state.input_data, dict):
-                state.files_content = state.input_data
-            else:
-                raise ValueError("Upload input_data must be a dictionary of file contents")
-            
-        else:
+        input_type = _INPUT_ALIASES.get(state.input_type, state.input_type)
+        fetcher = _FETCHERS.get(input_type)
+        if fetcher is None:
             error_msg = f"Unsupported input_type: {state.input_type}. Use: github, repo, url, zip, or upload"
             logger.error(f"[FETCH] ✗ {error_msg}")
             raise ValueError(error_msg)
         
+        fetcher(state)
         logger.info(f"[FETCH] ✅ SUCCESS - All files in memory, ZERO local storage used!")
             
     except Exception as e:
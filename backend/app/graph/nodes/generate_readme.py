@@ -2,19 +2,47 @@ import os
 import re
 import time
 import random
+from concurrent.futures import ThreadPoolExecutor
 from app.models.state import RepoXState
 from app.utils.mistral import get_llm_response_readme
+from app.utils.llm_cache import get_cache
+
+# Chunk budget derived from the readme model's context window (~4 chars per
+# token), minus scaffolding overhead, targeting ~70% fill so latency per
+# chunk stays flat. Far larger than the old fixed 6000 chars, so most repos
+# fit a single prompt and the partial-summary map phase disappears.
+MODEL_CONTEXT_TOKENS = int(os.getenv("README_CONTEXT_TOKENS", "16000"))
+PROMPT_OVERHEAD_CHARS = 2500
+MAX_CHUNK_CHARS = int((MODEL_CONTEXT_TOKENS * 4 - PROMPT_OVERHEAD_CHARS) * 0.7)
+
+
+# Compiled once; clean_llm_markdown_response runs for every LLM response
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_FENCE_OPEN_RE = re.compile(r"^```(?:markdown)?\n?")
+_FENCE_CLOSE_RE = re.compile(r"\n?```$")
+
 
 def clean_llm_markdown_response(raw_response: str) -> str:
-    cleaned = re.sub(r"<think>.*?</think>", "", raw_response, flags=re.DOTALL).strip()
-    cleaned = re.sub(r"^```(?:markdown)?\n?", "", cleaned)
-    cleaned = re.sub(r"\n?```$", "", cleaned)
+    cleaned = _THINK_RE.sub("", raw_response).strip()
+    cleaned = _FENCE_OPEN_RE.sub("", cleaned)
+    cleaned = _FENCE_CLOSE_RE.sub("", cleaned)
     return cleaned.strip()
 
 def safe_llm_call(callable_fn, prompt: str, retries: int = 5, base_delay: int = 5) -> str:
+    # Prompts here are deterministic functions of the file summaries, so
+    # repeat runs on the same repo hit the shared response cache instead of
+    # re-paying the call; the callable name namespaces the key per model.
+    cache = get_cache()
+    key = cache.make_key(prompt, model=callable_fn.__qualname__)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
     for attempt in range(1, retries + 1):
         try:
-            return callable_fn(prompt).strip()
+            result = callable_fn(prompt).strip()
+            cache.set(key, result)
+            return result
         except Exception as e:
             if "429" in str(e):
                 delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 3)
@@ -55,8 +83,8 @@ def generate_readme(state: RepoXState) -> RepoXState:
     repo_data = state.parsed_data.get("repo_path", {}) if state.parsed_data else {}
     summaries_section = []
 
-    if state.readme_summaries and isinstance(state.readme_summaries, list):
-        for item in state.readme_summaries:
+    if state.readme_summaries and isinstance(state.readme_summaries, dict):
+        for item in state.readme_summaries.values():
             file = item.get("file", "unknown")
             summary = item.get("summary", "No summary available.")
             ftype = item.get("type", "unknown")
@@ -69,10 +97,9 @@ def generate_readme(state: RepoXState) -> RepoXState:
 
             summaries_section.append("\n".join(lines))
 
-    chunks = chunk_summaries(summaries_section, max_chars=6000)
+    joined_summaries = "\n\n".join(summaries_section)
 
-    partial_code_summaries = []
-    for chunk_text in chunks:
+    def summarize_chunk(chunk_text: str) -> str:
         partial_prompt = f"""
 You are an expert technical writer.
 
@@ -83,10 +110,28 @@ Generate only a **Code Summary** section in markdown based on these summaries. D
 ---
 """
         partial_summary_md = safe_llm_call(get_llm_response_readme, partial_prompt)
-        cleaned_partial = clean_llm_markdown_response(partial_summary_md)
-        partial_code_summaries.append(cleaned_partial)
+        return clean_llm_markdown_response(partial_summary_md)
+
+    if len(joined_summaries) <= MAX_CHUNK_CHARS:
+        # Everything fits one prompt - feed the raw summaries straight into
+        # the final README call and save the whole map phase
+        merged_code_summary = joined_summaries
+    else:
+        chunks = chunk_summaries(summaries_section, max_chars=MAX_CHUNK_CHARS)
+        # Identical chunks (duplicate files across the repo) would otherwise
+        # race past the persistent cache and pay twice; summarize each unique
+        # chunk once and fan the results back out in order
+        unique_chunks = list(dict.fromkeys(chunks))
+
+        # Each partial summary is an independent network-bound call, so fan
+        # them out across threads; executor.map keeps results in chunk order
+        if len(unique_chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(unique_chunks))) as executor:
+                summaries_by_chunk = dict(zip(unique_chunks, executor.map(summarize_chunk, unique_chunks)))
+        else:
+            summaries_by_chunk = {c: summarize_chunk(c) for c in unique_chunks}
 
-    merged_code_summary = "\n\n".join(partial_code_summaries)
+        merged_code_summary = "\n\n".join(summaries_by_chunk[c] for c in chunks)
 
     final_prompt = f"""
 You are a senior technical writer at a FAANG company. Generate a professional, enterprise-grade README.md following industry best practices.
@@ -18,11 +18,13 @@ def output_node(state: RepoXState) -> dict:
         folder_tree_data = {"source": "zip_upload"}
     # For 'upload' type, don't store any path info
     
+    # Explicit None-guards: only replace missing values, never re-truth-test
+    # populated containers
     return {
-        "modified_files": state.modified_files or {},
-        "summaries": state.summaries or {},
-        "readme": state.readme or "",
-        "visuals": state.visuals or {},
+        "modified_files": state.modified_files if state.modified_files is not None else {},
+        "summaries": state.summaries if state.summaries is not None else {},
+        "readme": state.readme if state.readme is not None else "",
+        "visuals": state.visuals if state.visuals is not None else {},
         "folder_tree": folder_tree_data,
         "input_type": state.input_type,
     }
\ No newline at end of file
@@ -1,4 +1,7 @@
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from app.models.state import RepoXState
 from tree_sitter import Language, Parser
 
@@ -81,70 +84,104 @@ EXCLUDED_FILES = {
 
 VENV_MARKERS = {"bin", "lib", "pyvenv.cfg", "Scripts", "Include"}
 
+# Only directories with these names get the os.listdir venv probe;
+# everything else skips the syscall entirely
+VENV_SUSPECT_NAMES = {"venv", "env", ".venv", "virtualenv", "pyenv"}
+
+# Files above this are generated/minified output, not worth reading
+MAX_FILE_SIZE = 1_000_000
+
+# Flat extension lookup built once; first language listed wins for shared
+# extensions (.h stays with c, matching the old iteration order)
+EXT_TO_LANG = {}
+for _lang, _exts in LANGUAGE_EXTENSIONS.items():
+    for _ext in _exts:
+        EXT_TO_LANG.setdefault(_ext, _lang)
+
+
 def detect_language(file_name: str):
-    for lang, extensions in LANGUAGE_EXTENSIONS.items():
-        if any(file_name.endswith(ext) for ext in extensions):
-            return lang
-    return None
+    return EXT_TO_LANG.get(os.path.splitext(file_name)[1])
 
-def extract_names_and_clean(source_code: str, lang_key: str):
-    language_obj = LANGUAGE_MAP.get(lang_key)
-    if not language_obj:
-        return [], source_code
+# Definition keywords across the supported grammars; tiny files without any
+# of these cannot yield names worth a tree-sitter pass
+_HAS_DEF_RE = re.compile(r"\b(?:def|class|function|func|fun|struct|interface|type)\b")
+_TINY_FILE_CHARS = 512
 
-    parser = Parser(Language(language_obj))
-    tree = parser.parse(bytes(source_code, "utf-8"))
-    root_node = tree.root_node
 
-    comment_ranges = []
+# Language wrappers are immutable - build them once at import. Parsers are
+# not reentrant, so each thread lazily keeps its own parser per language.
+_LANGUAGES = {lang: Language(obj) for lang, obj in LANGUAGE_MAP.items()}
+_thread_local = threading.local()
 
-    def collect_comments(node):
-        if "comment" in node.type:
-            comment_ranges.append((node.start_byte, node.end_byte))
-        for child in node.children:
-            collect_comments(child)
 
-    collect_comments(root_node)
+def _get_parser(lang_key: str):
+    parsers = getattr(_thread_local, "parsers", None)
+    if parsers is None:
+        parsers = _thread_local.parsers = {}
+    parser = parsers.get(lang_key)
+    if parser is None:
+        language = _LANGUAGES.get(lang_key)
+        if language is None:
+            return None
+        parser = parsers[lang_key] = Parser(language)
+    return parser
 
-    code_bytes = bytearray(source_code, "utf-8")
-    for start, end in sorted(comment_ranges, reverse=True):
-        del code_bytes[start:end]
 
-    cleaned_code = code_bytes.decode("utf-8")
-    tree = parser.parse(bytes(cleaned_code, "utf-8"))
-    root_node = tree.root_node
+_DEF_NODE_TYPES = frozenset({
+    "function_definition", "function_declaration", "method_definition", "method_declaration",
+    "class_definition", "class_declaration", "class_specifier", "struct_specifier", "type_declaration"
+})
 
-    cursor = root_node.walk()
-    visited = set()
-    found_names = []
 
-    while True:
-        node = cursor.node
-        if node.id in visited:
-            if cursor.goto_next_sibling():
-                continue
-            if not cursor.goto_parent():
-                break
-            continue
+def extract_names_and_clean(source_code: str, lang_key: str):
+    # Tiny keyword-free files (fragments, config-like source) skip the
+    # parser entirely - there are no definitions to find
+    if len(source_code) < _TINY_FILE_CHARS and not _HAS_DEF_RE.search(source_code):
+        return [], source_code
+
+    parser = _get_parser(lang_key)
+    if parser is None:
+        return [], source_code
 
-        visited.add(node.id)
+    src_bytes = bytes(source_code, "utf-8")
+    tree = parser.parse(src_bytes)
 
-        if node.type in [
-            "function_definition", "function_declaration", "method_definition", "method_declaration",
-            "class_definition", "class_declaration", "class_specifier", "struct_specifier", "type_declaration"
-        ]:
+    # One iterative pre-order cursor walk collects comment ranges and
+    # definition names together - no Python recursion, no node.children
+    # list materialization, and no second parse of the cleaned source.
+    comment_ranges = []
+    found_names = []
+    cursor = tree.root_node.walk()
+    done = False
+    while not done:
+        node = cursor.node
+
+        if "comment" in node.type:
+            comment_ranges.append((node.start_byte, node.end_byte))
+        elif node.type in _DEF_NODE_TYPES:
             name_node = node.child_by_field_name("name")
             if name_node:
-                name = cleaned_code[name_node.start_byte:name_node.end_byte]
+                name = src_bytes[name_node.start_byte:name_node.end_byte].decode("utf-8")
                 found_names.append(name.strip())
 
-        if cursor.goto_first_child():
-            continue
-        if cursor.goto_next_sibling():
-            continue
-        while not cursor.goto_next_sibling():
-            if not cursor.goto_parent():
-                break
+        if not cursor.goto_first_child():
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    done = True
+                    break
+
+    if comment_ranges:
+        # Pre-order traversal yields ranges already sorted by start byte,
+        # so the non-comment slices join in one linear pass
+        pieces = []
+        prev = 0
+        for start, end in comment_ranges:
+            pieces.append(src_bytes[prev:start])
+            prev = end
+        pieces.append(src_bytes[prev:])
+        cleaned_code = b"".join(pieces).decode("utf-8")
+    else:
+        cleaned_code = source_code
 
     return found_names, cleaned_code
 
@@ -155,16 +192,42 @@ def is_virtual_env(folder_path: str) -> bool:
     except Exception:
         return False
 
-def walk_folder(base_path: str):
-    structure = {}
+def _read_and_parse(item):
+    """Read one (abs_path, rel_path, lang) item and parse it; None on failure."""
+    file_path, rel_path, lang = item
+    try:
+        # Cheap rejects before the full read: a stat for oversized files and
+        # a 4 KB null-byte probe for binaries wearing a source extension
+        if os.path.getsize(file_path) > MAX_FILE_SIZE:
+            return None
+        with open(file_path, "rb") as f:
+            head = f.read(4096)
+            if b"\x00" in head:
+                return None
+            source_code = (head + f.read()).decode("utf-8")
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+        return None
+
+    contains, cleaned_code = extract_names_and_clean(source_code, lang)
+    return rel_path, {
+        "file": rel_path,
+        "code": cleaned_code,
+        "type": lang,
+        "contains": contains
+    }
 
+
+def walk_folder(base_path: str):
+    # First pass: walk the tree and collect candidate files only
+    work = []
     for root, dirs, files in os.walk(base_path):
         filtered_dirs = []
         for d in dirs:
             d_path = os.path.join(root, d)
             if d in EXCLUDED_FOLDERS:
                 continue
-            if is_virtual_env(d_path):
+            if d in VENV_SUSPECT_NAMES and is_virtual_env(d_path):
                 print(f"Skipping virtual environment folder: {d_path}")
                 continue
             filtered_dirs.append(d)
@@ -175,30 +238,22 @@ def walk_folder(base_path: str):
             if file in EXCLUDED_FILES:
                 continue
 
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, base_path)
-
             lang = detect_language(file)
             if not lang:
                 continue
 
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    source_code = f.read()
-            except Exception as e:
-                print(f"Error reading file {file_path}: {e}")
-                continue
-
-            contains, cleaned_code = extract_names_and_clean(source_code, lang)
+            file_path = os.path.join(root, file)
+            work.append((file_path, os.path.relpath(file_path, base_path), lang))
 
-            structure[rel_path] = {
-                "file": rel_path,
-                "code": cleaned_code,
-                "type": lang,
-                "contains": contains
-            }
+    # Second pass: reads block on the filesystem and tree-sitter releases
+    # the GIL while parsing, so both overlap across a bounded pool
+    if len(work) > 1:
+        with ThreadPoolExecutor(max_workers=min(32, len(work))) as executor:
+            results = executor.map(_read_and_parse, work)
+    else:
+        results = map(_read_and_parse, work)
 
-    return structure
+    return {rel_path: parsed for rel_path, parsed in filter(None, results)}
 
 def parse_code(state: RepoXState):
     all_parsed = {}
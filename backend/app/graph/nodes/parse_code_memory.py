@@ -3,6 +3,9 @@ In-memory version of parse_code that works directly with file content dictionary
 No temporary file storage needed!
 """
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from app.models.state import RepoXState
 from tree_sitter import Language, Parser
 
@@ -84,93 +87,139 @@ EXCLUDED_FOLDERS = {
 }
 
 
+# One compiled alternation scans the whole path in C instead of splitting
+# into a parts list and looping in Python per file
+_EXCL_FOLDER_RE = re.compile(
+    r"(?:^|/)(?:%s)(?:/|$)" % "|".join(map(re.escape, sorted(EXCLUDED_FOLDERS)))
+)
+
+
+# Flat extension lookup built once; first language listed wins for shared
+# extensions (.h stays with c, matching the old iteration order)
+EXT_TO_LANG = {}
+for _lang, _exts in LANGUAGE_EXTENSIONS.items():
+    for _ext in _exts:
+        EXT_TO_LANG.setdefault(_ext, _lang)
+
+
 def detect_language(file_name: str):
     """Detect programming language from file extension"""
-    for lang, extensions in LANGUAGE_EXTENSIONS.items():
-        if any(file_name.endswith(ext) for ext in extensions):
-            return lang
-    return None
+    return EXT_TO_LANG.get(os.path.splitext(file_name)[1])
 
 
 def should_exclude_file(file_path: str) -> bool:
     """Check if file should be excluded based on name or path"""
-    filename = os.path.basename(file_path)
-    
-    # Check excluded filenames
-    if filename in EXCLUDED_FILES:
+    if file_path.rpartition('/')[2] in EXCLUDED_FILES:
         return True
     
-    # Check if in excluded folder
-    path_parts = file_path.split('/')
-    if any(part in EXCLUDED_FOLDERS for part in path_parts):
-        return True
-    
-    return False
+    return _EXCL_FOLDER_RE.search(file_path) is not None
 
 
-def extract_names_and_clean(source_code: str, lang_key: str):
-    """Extract function/class names and remove comments"""
-    language_obj = LANGUAGE_MAP.get(lang_key)
-    if not language_obj:
-        return [], source_code
+# Definition keywords across the supported grammars; tiny files without any
+# of these cannot yield names worth a tree-sitter pass
+_HAS_DEF_RE = re.compile(r"\b(?:def|class|function|func|fun|struct|interface|type)\b")
+_TINY_FILE_CHARS = 512
 
-    parser = Parser(Language(language_obj))
-    tree = parser.parse(bytes(source_code, "utf-8"))
-    root_node = tree.root_node
 
-    comment_ranges = []
+# Language wrappers are immutable - build them once at import. Parsers are
+# not reentrant, so each thread lazily keeps its own parser per language.
+_LANGUAGES = {lang: Language(obj) for lang, obj in LANGUAGE_MAP.items()}
+_thread_local = threading.local()
 
-    def collect_comments(node):
-        if "comment" in node.type:
-            comment_ranges.append((node.start_byte, node.end_byte))
-        for child in node.children:
-            collect_comments(child)
 
-    collect_comments(root_node)
+def _get_parser(lang_key: str):
+    parsers = getattr(_thread_local, "parsers", None)
+    if parsers is None:
+        parsers = _thread_local.parsers = {}
+    parser = parsers.get(lang_key)
+    if parser is None:
+        language = _LANGUAGES.get(lang_key)
+        if language is None:
+            return None
+        parser = parsers[lang_key] = Parser(language)
+    return parser
 
-    code_bytes = bytearray(source_code, "utf-8")
-    for start, end in sorted(comment_ranges, reverse=True):
-        del code_bytes[start:end]
 
-    cleaned_code = code_bytes.decode("utf-8")
-    tree = parser.parse(bytes(cleaned_code, "utf-8"))
-    root_node = tree.root_node
+_DEF_NODE_TYPES = frozenset({
+    "function_definition", "function_declaration", "method_definition", "method_declaration",
+    "class_definition", "class_declaration", "class_specifier", "struct_specifier", "type_declaration"
+})
 
-    cursor = root_node.walk()
-    visited = set()
-    found_names = []
 
-    while True:
-        node = cursor.node
-        if node.id in visited:
-            if cursor.goto_next_sibling():
-                continue
-            if not cursor.goto_parent():
-                break
-            continue
+def extract_names_and_clean(source_code: str, lang_key: str):
+    """Extract function/class names and remove comments"""
+    # Tiny keyword-free files (fragments, config-like source) skip the
+    # parser entirely - there are no definitions to find
+    if len(source_code) < _TINY_FILE_CHARS and not _HAS_DEF_RE.search(source_code):
+        return [], source_code
 
-        visited.add(node.id)
+    parser = _get_parser(lang_key)
+    if parser is None:
+        return [], source_code
 
-        if node.type in [
-            "function_definition", "function_declaration", "method_definition", "method_declaration",
-            "class_definition", "class_declaration", "class_specifier", "struct_specifier", "type_declaration"
-        ]:
+    src_bytes = bytes(source_code, "utf-8")
+    tree = parser.parse(src_bytes)
+
+    # One iterative pre-order cursor walk collects comment ranges and
+    # definition names together - no Python recursion, no node.children
+    # list materialization, and no second parse of the cleaned source.
+    comment_ranges = []
+    found_names = []
+    cursor = tree.root_node.walk()
+    done = False
+    while not done:
+        node = cursor.node
+
+        if "comment" in node.type:
+            comment_ranges.append((node.start_byte, node.end_byte))
+        elif node.type in _DEF_NODE_TYPES:
             name_node = node.child_by_field_name("name")
             if name_node:
-                name = cleaned_code[name_node.start_byte:name_node.end_byte]
+                name = src_bytes[name_node.start_byte:name_node.end_byte].decode("utf-8")
                 found_names.append(name.strip())
 
-        if cursor.goto_first_child():
-            continue
-        if cursor.goto_next_sibling():
-            continue
-        while not cursor.goto_next_sibling():
-            if not cursor.goto_parent():
-                break
+        if not cursor.goto_first_child():
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    done = True
+                    break
+
+    if comment_ranges:
+        # Pre-order traversal yields ranges already sorted by start byte,
+        # so the non-comment slices join in one linear pass
+        pieces = []
+        prev = 0
+        for start, end in comment_ranges:
+            pieces.append(src_bytes[prev:start])
+            prev = end
+        pieces.append(src_bytes[prev:])
+        cleaned_code = b"".join(pieces).decode("utf-8")
+    else:
+        cleaned_code = source_code
 
     return found_names, cleaned_code
 
 
+# Below this many files the executor costs more than it saves
+_PARSE_PARALLEL_MIN = 8
+
+
+def _parse_one(item):
+    """Parse a single (path, source, lang) work item; None on failure."""
+    file_path, source_code, lang = item
+    try:
+        contains, cleaned_code = extract_names_and_clean(source_code, lang)
+    except Exception as e:
+        print(f"Error parsing file {file_path}: {e}")
+        return None
+    return file_path, {
+        "file": file_path,
+        "code": cleaned_code,
+        "type": lang,
+        "contains": contains
+    }
+
+
 def parse_code_from_memory(files_content: dict) -> dict:
     """
     Parse code directly from in-memory file content dictionary.
@@ -181,34 +230,25 @@ def parse_code_from_memory(files_content: dict) -> dict:
     Returns:
         Dictionary mapping file paths to parsed data
     """
-    structure = {}
-    
+    # Filter before dispatch so skipped files never occupy the pool
+    work = []
     for file_path, source_code in files_content.items():
-        # Skip excluded files
         if should_exclude_file(file_path):
             continue
-        
-        # Detect language
         lang = detect_language(file_path)
         if not lang:
             continue
-        
-        try:
-            # Extract function names and clean code
-            contains, cleaned_code = extract_names_and_clean(source_code, lang)
-            
-            structure[file_path] = {
-                "file": file_path,
-                "code": cleaned_code,
-                "type": lang,
-                "contains": contains
-            }
-            
-        except Exception as e:
-            print(f"Error parsing file {file_path}: {e}")
-            continue
+        work.append((file_path, source_code, lang))
+    
+    # tree-sitter releases the GIL inside parser.parse, so threads scale
+    # across cores on the parse-heavy part of each item
+    if len(work) >= _PARSE_PARALLEL_MIN:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(_parse_one, work)
+    else:
+        results = map(_parse_one, work)
     
-    return structure
+    return {file_path: parsed for file_path, parsed in filter(None, results)}
 
 
 def parse_code_memory(state: RepoXState):
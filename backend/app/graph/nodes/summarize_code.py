@@ -1,19 +1,71 @@
+from typing import Optional
 from app.models.state import RepoXState
-from app.utils.mistral import get_llm_response_summary
+from app.utils.mistral import get_llm_response_summary, get_llm_response_summary_async
+from app.utils.llm_cache import get_cache, json_loads
+from app.utils.rate_limit import get_limiter, estimate_tokens
+import asyncio
+import ast
 import re
 import time
 import random
+from array import array
 
 CHUNK_SIZE = 300
 CHUNK_OVERLAP = 10
 
+# Bump when the chunk prompt template changes so stale cached summaries
+# are not served for the new wording
+_PROMPT_VERSION = "summary-v1"
+
+# Proactive limiter shared with every caller of the summary model; sized
+# per plan via SUMMARY_RPM / SUMMARY_TPM env vars
+_LIMITER = get_limiter("summary")
+
+# Identical prompts in flight at the same time (license headers, generated
+# boilerplate shared across files) collapse onto one awaited future
+_inflight: dict = {}
+
+# Cap on concurrent chunk-level LLM calls across all files in flight
+CHUNK_CONCURRENCY = 16
+
+# Several short chunks get marshaled into one delimited prompt up to this
+# budget, cutting request count without approaching the context window
+MARSHAL_BUDGET_TOKENS = 6000
+
+# Files under this many stripped chars get a canned summary, no LLM call
+TRIVIAL_FILE_CHARS = 64
+
+# Files at or under this estimated size are summarized many-per-call with
+# a JSON response instead of one call each
+SMALL_FILE_TOKENS = 1000
+BATCH_BUDGET_TOKENS = 8000
+BATCH_MAX_FILES = 30
+
+_SEG_DELIM_RE = re.compile(r"===SEG \d+===")
+
+# Compiled once - this runs per response line, and the pattern includes a
+# non-ASCII dash whose class lookup is not free to redo on every call
+_BULLET_RE = re.compile(r"([\w_]+)\s*[:\-–]\s*(.+)")
+
 def split_code_into_chunks(code: str, lines_per_chunk=CHUNK_SIZE, overlap=CHUNK_OVERLAP) -> list[str]:
-    lines = code.splitlines()
-    chunks = []
-    for i in range(0, len(lines), lines_per_chunk - overlap):
-        chunk = "\n".join(lines[i:i + lines_per_chunk])
-        chunks.append(chunk)
-    return chunks
+    # Record line-start offsets and slice chunks straight out of the
+    # original string - no materialized line list, no per-chunk join, so
+    # peak memory stays ~1x the file instead of ~3x on large sources.
+    # array('i') packs offsets at 4 bytes each vs ~28 for boxed ints.
+    line_offsets = array("i", [0])
+    pos = code.find("\n")
+    while pos != -1:
+        line_offsets.append(pos + 1)
+        pos = code.find("\n", pos + 1)
+    if len(line_offsets) > 1 and line_offsets[-1] == len(code):
+        line_offsets.pop()  # trailing newline starts no new line
+    n_lines = len(line_offsets) if code else 0
+    line_offsets.append(len(code))
+
+    return [
+        code[line_offsets[i]:line_offsets[min(i + lines_per_chunk, n_lines)]]
+        for i in range(0, n_lines, lines_per_chunk - overlap)
+    ]
 
 def parse_llm_summary_response(response: str) -> list[dict]:
     lines = [
@@ -23,7 +75,7 @@ def parse_llm_summary_response(response: str) -> list[dict]:
     ]
     structured = []
     for line in lines:
-        match = re.match(r"([\w_]+)\s*[:\-–]\s*(.+)", line)
+        match = _BULLET_RE.match(line)
         if match:
             symbol, summary = match.groups()
             structured.append({"symbol": symbol.strip(), "summary": summary.strip()})
@@ -31,76 +83,432 @@ def parse_llm_summary_response(response: str) -> list[dict]:
             structured.append({"symbol": None, "summary": line})
     return structured
 
+def _is_transient(exc: Exception) -> bool:
+    """Only rate limits, timeouts and 5xx are worth retrying; auth or
+    request errors will fail identically on every attempt."""
+    text = str(exc).lower()
+    return ("429" in text or "rate limit" in text or "timeout" in text
+            or "overloaded" in text or "temporarily" in text
+            or any(code in text for code in ("500", "502", "503", "504")))
+
+
 def safe_llm_call(prompt: str, language: str, max_retries=5, base_wait=2.0):
+    cache = get_cache()
+    key = cache.make_key(prompt, language=language, model=_PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    wait = _LIMITER.reserve(estimate_tokens(prompt))
+    if wait > 0:
+        time.sleep(wait)
+
     for attempt in range(max_retries):
         try:
             print("summarizing")
             sum = get_llm_response_summary(prompt=prompt, language=language)
             print(sum)
+            cache.set(key, sum.strip())
             return sum.strip()
         except Exception as e:
             print(e)
+            if not _is_transient(e):
+                raise
             wait_time = base_wait * (2 ** attempt) + random.uniform(0, 1)
             print(f"[Retry] LLM call failed on attempt {attempt+1}: {e}. Retrying in {wait_time:.1f}s...")
             time.sleep(wait_time)
     raise RuntimeError("LLM call failed after maximum retries.")
 
-def summarize_code_node(state: RepoXState) -> RepoXState:
-    if not state.preferences.generate_summary or not state.parsed_data:
-        return state
 
-    file_path = state.current_file_path
-    file_info = state.parsed_data["repo_path"][file_path]
+async def safe_llm_call_async(prompt: str, language: str, max_retries=5, base_wait=2.0):
+    """Async twin of safe_llm_call - sleeps without blocking the event loop."""
+    cache = get_cache()
+    key = cache.make_key(prompt, language=language, model=_PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    # A concurrent call for the same prompt is already running - await its
+    # result instead of paying for a duplicate round-trip
+    existing = _inflight.get(key)
+    if existing is not None:
+        return await existing
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await _llm_call_with_retries(prompt, language, key, cache,
+                                              max_retries, base_wait)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved so a waiter-less failure won't warn at GC
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _llm_call_with_retries(prompt, language, key, cache, max_retries, base_wait):
+    # Throttle before submitting instead of backing off after a 429
+    wait = _LIMITER.reserve(estimate_tokens(prompt))
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+    for attempt in range(max_retries):
+        try:
+            response = await get_llm_response_summary_async(prompt=prompt, language=language)
+            cache.set(key, response.strip())
+            return response.strip()
+        except Exception as e:
+            if not _is_transient(e):
+                raise
+            wait_time = base_wait * (2 ** attempt) + random.uniform(0, 1)
+            print(f"[Retry] LLM call failed on attempt {attempt+1}: {e}. Retrying in {wait_time:.1f}s...")
+            await asyncio.sleep(wait_time)
+    raise RuntimeError("LLM call failed after maximum retries.")
+
+
+# Assembled once at import; per call only the two placeholders are
+# substituted instead of re-concatenating a dozen f-string pieces
+_SUMMARY_PROMPT_TMPL = (
+    "Analyze the following {language} source file carefully for README documentation purposes. "
+    "Write a concise technical summary (2-4 sentences) that includes: "
+    "1) The file's primary purpose and functionality "
+    "2) Key classes/functions and their roles (only the most important ones) "
+    "3) How this file contributes to the overall application "
+    "4) Any notable implementation details, algorithms, or patterns used "
+    "5) **All** API endpoints, routes, or public interfaces if present (with HTTP methods and paths) "
+    "Focus on information that would help developers understand this component's role in the codebase. "
+    "Do NOT list every function - only highlight core functionality that defines what this file does. "
+    "If this file contains API routes, endpoints, or public interfaces, mention them specifically. "
+    "Keep it technical but accessible for README documentation.\n\n"
+    "### Code:\n{chunk}"
+)
+
+
+def _build_chunk_prompt(language: str, chunk: str) -> str:
+    return _SUMMARY_PROMPT_TMPL.format(language=language, chunk=chunk.strip())
+
+
+def _trivial_summary(file_code: str, language: str):
+    """Canned summary for files with nothing worth an LLM round-trip.
+
+    Catches near-empty files in any language and Python modules whose
+    bodies hold only imports and bare expressions (re-export shims,
+    empty-ish __init__.py). Returns None when the file deserves a call.
+    """
+    stripped = file_code.strip()
+    if len(stripped) < TRIVIAL_FILE_CHARS:
+        return f"Minimal {language} file with no substantive logic to document."
+
+    if language == "python":
+        try:
+            tree = ast.parse(file_code)
+        except SyntaxError:
+            return None
+        if all(isinstance(n, (ast.Import, ast.ImportFrom, ast.Expr)) for n in tree.body):
+            return ("Python module containing only imports and module-level "
+                    "expressions; it re-exports or wires up other modules "
+                    "rather than defining logic of its own.")
+    return None
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 chars per token is close enough for budget packing
+    return len(text) // 4
+
+
+def _pack_chunks(chunks: list[str]) -> list[list[str]]:
+    """Greedily pack chunks into groups under the marshal token budget."""
+    groups = []
+    current, current_tokens = [], 0
+    for chunk in chunks:
+        tokens = _estimate_tokens(chunk)
+        if current and current_tokens + tokens > MARSHAL_BUDGET_TOKENS:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _build_marshal_prompt(language: str, group: list[str]) -> str:
+    n = len(group)
+    segments = "\n\n".join(
+        f"===SEG {i + 1}===\n{chunk.strip()}" for i, chunk in enumerate(group)
+    )
+    return (
+        f"Analyze each of the following {n} {language} code segments for README documentation purposes. "
+        f"For EACH segment write a concise technical summary (2-4 sentences) covering: "
+        f"its primary purpose and functionality, key classes/functions and their roles, "
+        f"how it contributes to the overall application, notable implementation details, "
+        f"and **all** API endpoints, routes, or public interfaces if present (with HTTP methods and paths). "
+        f"Output exactly {n} blocks, each preceded by its own delimiter line '===SEG K===' "
+        f"matching the input numbering. Do not add any other commentary.\n\n{segments}"
+    )
+
+
+def _split_marshal_response(response: str, n: int):
+    """Split a marshaled response back into per-segment texts.
+
+    Returns None when the model did not honor the delimiter contract, so
+    the caller can fall back to one call per chunk.
+    """
+    parts = [p.strip() for p in _SEG_DELIM_RE.split(response) if p.strip()]
+    return parts if len(parts) == n else None
+
+
+def _combine_summaries(file_path: str, language: str, symbols: list, responses: list) -> dict:
+    """Fold per-chunk responses (strings or exceptions) into one summary record."""
+    all_structured_summaries = []
+    for response in responses:
+        if isinstance(response, BaseException):
+            print(f"[Error] Failed summarizing chunk in {file_path} even after retries: {response}")
+            continue
+        print(f"[LLM RAW RESPONSE for {file_path}]:\n{response}\n{'-' * 50}")
+        all_structured_summaries.extend(parse_llm_summary_response(response))
+
+    combined_summary = " ".join([s['summary'] for s in all_structured_summaries if s['summary']]).strip()
+
+    return {
+        "file": file_path,
+        "summary": combined_summary if combined_summary else "No summary available.",
+        "type": language,
+        "contains": symbols
+    }
+
 
+def summarize_file(file_path: str, file_info: dict) -> dict:
+    """Summarize a single file without touching shared state.
+
+    Pure function so callers can fan it out across a worker pool.
+    Returns a summary record, or an empty dict when there is nothing to summarize.
+    """
     file_code = file_info.get("code", "")
     language = file_info.get("type", "text")
     symbols = file_info.get("contains", [])
 
     if not file_code.strip():
-        return state
+        return {}
 
-    chunks = split_code_into_chunks(file_code)
-    all_structured_summaries = []
+    trivial = _trivial_summary(file_code, language)
+    if trivial is not None:
+        return {"file": file_path, "summary": trivial, "type": language, "contains": symbols}
 
-    for chunk in chunks:
-        prompt = (
-            f"Analyze the following {language} source file carefully for README documentation purposes. "
-            f"Write a concise technical summary (2-4 sentences) that includes: "
-            f"1) The file's primary purpose and functionality "
-            f"2) Key classes/functions and their roles (only the most important ones) "
-            f"3) How this file contributes to the overall application "
-            f"4) Any notable implementation details, algorithms, or patterns used "
-            f"5) **All** API endpoints, routes, or public interfaces if present (with HTTP methods and paths) "
-            f"Focus on information that would help developers understand this component's role in the codebase. "
-            f"Do NOT list every function - only highlight core functionality that defines what this file does. "
-            f"If this file contains API routes, endpoints, or public interfaces, mention them specifically. "
-            f"Keep it technical but accessible for README documentation.\n\n"
-            f"### Code:\n{chunk.strip()}"
+    responses = []
+    for group in _pack_chunks(split_code_into_chunks(file_code)):
+        responses.extend(_summarize_group(language, group))
+
+    return _combine_summaries(file_path, language, symbols, responses)
+
+
+def _summarize_group(language: str, group: list[str]) -> list:
+    """Summarize one packed group, falling back to per-chunk calls when the
+    marshaled response cannot be split cleanly."""
+    if len(group) > 1:
+        try:
+            response = safe_llm_call(_build_marshal_prompt(language, group), language)
+            parts = _split_marshal_response(response, len(group))
+            if parts is not None:
+                return parts
+            print(f"[Marshal] Delimiter parse failed for {len(group)} segments; retrying per chunk")
+        except Exception as e:
+            return [e]
+
+    results = []
+    for chunk in group:
+        try:
+            results.append(safe_llm_call(_build_chunk_prompt(language, chunk), language))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def summarize_file_async(file_path: str, file_info: dict,
+                               sem: Optional[asyncio.Semaphore] = None) -> dict:
+    """Async summarize_file - chunks are independent LLM round-trips, so
+    issue them concurrently instead of paying the sum of their latencies.
+
+    An optional shared semaphore bounds total in-flight calls when many
+    files are summarized at once; without one a per-file bound applies.
+    """
+    file_code = file_info.get("code", "")
+    language = file_info.get("type", "text")
+    symbols = file_info.get("contains", [])
+
+    if not file_code.strip():
+        return {}
+
+    trivial = _trivial_summary(file_code, language)
+    if trivial is not None:
+        return {"file": file_path, "summary": trivial, "type": language, "contains": symbols}
+
+    sem = sem or asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def _call(prompt: str) -> str:
+        async with sem:
+            return await safe_llm_call_async(prompt, language)
+
+    async def _one_group(group: list[str]) -> list:
+        if len(group) > 1:
+            try:
+                response = await _call(_build_marshal_prompt(language, group))
+                parts = _split_marshal_response(response, len(group))
+                if parts is not None:
+                    return parts
+                print(f"[Marshal] Delimiter parse failed for {len(group)} segments; retrying per chunk")
+            except Exception as e:
+                return [e]
+        results = await asyncio.gather(
+            *[_call(_build_chunk_prompt(language, c)) for c in group],
+            return_exceptions=True
         )
+        return list(results)
+
+    groups = _pack_chunks(split_code_into_chunks(file_code))
+    responses = []
+    for group_result in await asyncio.gather(*[_one_group(g) for g in groups]):
+        responses.extend(group_result)
+
+    return _combine_summaries(file_path, language, symbols, responses)
+
+
+def _build_batch_prompt(language: str, items: list) -> str:
+    files_block = "\n\n".join(
+        f"===FILE: {fp}===\n{fi.get('code', '').strip()}" for fp, fi in items
+    )
+    return (
+        f"You are given {len(items)} small {language} source files. For EACH file write a "
+        f"concise technical summary (2-4 sentences) covering its purpose, key definitions, "
+        f"and any API endpoints or public interfaces. "
+        f"Respond with ONLY a JSON object mapping each file path (exactly as given) to its "
+        f"summary string. No markdown fences, no commentary.\n\n{files_block}"
+    )
+
+
+def _parse_batch_response(response: str, paths: list):
+    """Parse the JSON file->summary map; None when it cannot be trusted."""
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json_loads(response[start:end + 1])
+    except Exception:
+        return None
+    if not isinstance(data, dict) or any(fp not in data for fp in paths):
+        return None
+    return data
+
+
+async def _summarize_batch_async(language: str, items: list,
+                                 sem: asyncio.Semaphore) -> list[dict]:
+    """Summarize a pack of small same-language files in one JSON call.
+
+    Falls back to the per-file path when the model's JSON does not cover
+    every file, so batching can only save calls, never drop summaries.
+    """
+    async with sem:
         try:
-            response = safe_llm_call(prompt, language)
-            print(f"[LLM RAW RESPONSE for {file_path}]:\n{response}\n{'-' * 50}")
-            structured = parse_llm_summary_response(response)
-            all_structured_summaries.extend(structured)
+            response = await safe_llm_call_async(_build_batch_prompt(language, items), language)
         except Exception as e:
-            print(f"[Error] Failed summarizing chunk in {file_path} even after retries: {e}")
+            print(f"[Batch] Batched summary call failed ({e}); retrying per file")
+            response = None
 
-    combined_summary = " ".join([s['summary'] for s in all_structured_summaries if s['summary']]).strip()
+    data = _parse_batch_response(response, [fp for fp, _ in items]) if response else None
+    if data is None:
+        if response is not None:
+            print(f"[Batch] JSON parse failed for {len(items)} files; retrying per file")
+        results = await asyncio.gather(
+            *[summarize_file_async(fp, fi, sem=sem) for fp, fi in items],
+            return_exceptions=True
+        )
+        return [r for r in results if isinstance(r, dict)]
+
+    return [
+        {
+            "file": fp,
+            "summary": str(data[fp]).strip() or "No summary available.",
+            "type": language,
+            "contains": fi.get("contains", []),
+        }
+        for fp, fi in items
+    ]
+
+
+async def summarize_files_async(repo_data: dict, sem: asyncio.Semaphore) -> list[dict]:
+    """Summarize every parsed file, batching the small ones.
+
+    Small files (configs, __init__.py and the like) dominate most repos;
+    packing them many-per-call by language cuts request count by an order
+    of magnitude while big files keep the chunked per-file path.
+    """
+    small_by_lang: dict = {}
+    tasks = []
+    records = []
+    for fp, fi in repo_data.items():
+        code = fi.get("code", "")
+        if not code.strip():
+            continue
+        language = fi.get("type", "text")
+        trivial = _trivial_summary(code, language)
+        if trivial is not None:
+            records.append({"file": fp, "summary": trivial, "type": language,
+                            "contains": fi.get("contains", [])})
+            continue
+        if estimate_tokens(code) <= SMALL_FILE_TOKENS:
+            small_by_lang.setdefault(fi.get("type", "text"), []).append((fp, fi))
+        else:
+            tasks.append(summarize_file_async(fp, fi, sem=sem))
+
+    for language, entries in small_by_lang.items():
+        batch, batch_tokens = [], 0
+        for fp, fi in entries:
+            tokens = estimate_tokens(fi.get("code", ""))
+            if batch and (batch_tokens + tokens > BATCH_BUDGET_TOKENS
+                          or len(batch) >= BATCH_MAX_FILES):
+                tasks.append(_summarize_batch_async(language, batch, sem))
+                batch, batch_tokens = [], 0
+            batch.append((fp, fi))
+            batch_tokens += tokens
+        if batch:
+            tasks.append(_summarize_batch_async(language, batch, sem))
+
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, BaseException):
+            print(f"[Error] Summarization task failed: {result}")
+        elif isinstance(result, list):
+            records.extend(result)
+        elif result:
+            records.append(result)
+    return records
+
+
+def apply_summary(state: RepoXState, record: dict) -> RepoXState:
+    """Merge a summarize_file record into state."""
+    if not record:
+        return state
+
+    file_path = record["file"]
 
     if not state.readme_summaries:
-        state.readme_summaries = []
+        state.readme_summaries = {}
 
-    state.readme_summaries = [
-        s for s in state.readme_summaries if s["file"] != file_path
-    ]
+    state.readme_summaries[file_path] = record
 
-    state.readme_summaries.append({
-        "file": file_path,
-        "summary": combined_summary if combined_summary else "No summary available.",
-        "type": language,
-        "contains": symbols
-    })
+    state.summaries[file_path] = record["summary"] if record["summary"] != "No summary available." else ""
+
+    return state
 
-    state.summaries[file_path] = combined_summary
 
-    return state
\ No newline at end of file
+def summarize_code_node(state: RepoXState) -> RepoXState:
+    if not state.preferences.generate_summary or not state.parsed_data:
+        return state
+
+    file_path = state.current_file_path
+    file_info = state.parsed_data["repo_path"][file_path]
+
+    record = summarize_file(file_path, file_info)
+    return apply_summary(state, record)
\ No newline at end of file
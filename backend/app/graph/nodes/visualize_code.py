@@ -1,112 +1,132 @@
 from app.models.state import RepoXState
 from app.utils.mistral import get_llm_response_readme
+from app.utils.llm_cache import get_cache
 from app.prompts.diagram_prompts import (
     SYSTEM_EXPLANATION_PROMPT,
     SYSTEM_MAPPING_PROMPT,
     SYSTEM_DIAGRAM_PROMPT
 )
+import asyncio
+import functools
 import re
 import random
-import time
 
-def safe_llm_call(prompt: str, max_retries: int = 5, base_wait: float = 2.0) -> str:
+# Bump when any diagram prompt template changes so cached phase outputs
+# are not replayed against the new wording
+_PROMPT_VERSION = "diagram-v1"
+
+
+@functools.lru_cache(maxsize=16)
+def _render_file_tree(file_paths: tuple) -> str:
+    """Render the sorted folder/file listing for the diagram prompts.
+
+    Keyed on the immutable path tuple so re-runs over the same repo reuse
+    the rendered string instead of rebuilding and re-sorting the tree.
+    """
+    # Walk each path upward with rsplit instead of re-concatenating prefix
+    # strings per component; the break makes shared parents - the common
+    # case in deep trees - cost one set probe instead of a re-walk.
+    all_paths = set(file_paths)
+    for file_path in file_paths:
+        d = file_path
+        while "/" in d:
+            d = d.rsplit("/", 1)[0]
+            folder = d + "/"
+            if folder in all_paths:
+                break
+            all_paths.add(folder)
+    return "\n".join(sorted(all_paths))
+
+async def safe_llm_call(prompt: str, max_retries: int = 5, base_wait: float = 2.0) -> str:
+    # Phase prompts embed everything the output depends on (file tree,
+    # README, explanation), so an exact-match key on the prompt makes
+    # re-runs over an unchanged repo hit for all three phases.
+    cache = get_cache()
+    key = cache.make_key(prompt, model=_PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
     for attempt in range(max_retries):
         try:
-            return get_llm_response_readme(prompt).strip()
+            response = await asyncio.to_thread(get_llm_response_readme, prompt)
+            cache.set(key, response.strip())
+            return response.strip()
         except Exception as e:
             wait_time = base_wait * (2 ** attempt) + random.uniform(0, 1)
             if "429" in str(e) or "rate limit" in str(e).lower():
                 print(f"Rate limit or transient error. Retrying in {wait_time:.1f}s... (Attempt {attempt+1}/{max_retries})")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
             else:
                 print(f"LLM call failed: {e}")
                 raise
     raise RuntimeError("LLM call failed after maximum retries.")
 
-def visualize_code_node(state: RepoXState) -> RepoXState:
-    # Check if we have parsed data (no need for working_dir anymore)
-    if not state.parsed_data:
-        return state
 
-    repo_data = state.parsed_data.get("repo_path", {})
-    file_paths = sorted(repo_data.keys())
+# Compiled once: think-tag strip, fence strip, and one alternation that
+# finds the diagram header in a single scan instead of five .find passes
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_FENCE_RE = re.compile(r"```(?:mermaid)?")
+_START_RE = re.compile(r"flowchart\s+(?:TD|LR|TB)|graph\s+(?:TD|LR)")
 
-    # Build file tree
-    all_paths = set()
-    for file_path in file_paths:
-        parts = file_path.split("/")
-        for i in range(1, len(parts)):
-            folder = "/".join(parts[:i]) + "/"
-            all_paths.add(folder)
-        all_paths.add(file_path)
 
-    folder_structure = "\n".join(sorted(all_paths))
-    readme_content = state.readme or "No README available"
+def _clean_mermaid(mermaid_response: str) -> str:
+    """Strip think-tags and code fences, then cut to the diagram header."""
+    mermaid_code = _FENCE_RE.sub("", _THINK_RE.sub("", mermaid_response)).strip()
+
+    match = _START_RE.search(mermaid_code)
+    if match:
+        return mermaid_code[match.start():].strip()
+    return mermaid_code
 
-    print("🎨 Using GitDiagram-style 3-phase approach...")
-    
-    # Phase 1: Generate explanation
-    print("📝 Phase 1: Generating architecture explanation...")
-    explanation_prompt = f"""{SYSTEM_EXPLANATION_PROMPT}
 
-<file_tree>
+# Phase 1 and 2 prompts lead with the identical <file_tree> block so the
+# provider's automatic prefix caching can reuse the processed tree tokens
+# across both calls - the task-specific instructions come after the data.
+
+async def _phase1_explanation(folder_structure: str, readme_content: str) -> str:
+    explanation_prompt = f"""<file_tree>
 {folder_structure}
 </file_tree>
 
 <readme>
 {readme_content}
-</readme>"""
+</readme>
 
-    try:
-        explanation_response = safe_llm_call(explanation_prompt)
-        
-        # Extract explanation from tags
-        explanation_start = explanation_response.find("<explanation>")
-        explanation_end = explanation_response.find("</explanation>")
-        
-        if explanation_start != -1 and explanation_end != -1:
-            explanation = explanation_response[explanation_start + 13:explanation_end].strip()
-        else:
-            explanation = explanation_response.strip()
-        
-        print(f"✅ Phase 1 complete. Explanation length: {len(explanation)} chars")
-        
-    except Exception as e:
-        print(f"❌ Error in Phase 1: {e}")
-        explanation = "System architecture explanation not available"
-    
-    # Phase 2: Map components to files
-    print("�️  Phase 2: Mapping components to files...")
-    mapping_prompt = f"""{SYSTEM_MAPPING_PROMPT}
+{SYSTEM_EXPLANATION_PROMPT}"""
+
+    explanation_response = await safe_llm_call(explanation_prompt)
+
+    explanation_start = explanation_response.find("<explanation>")
+    explanation_end = explanation_response.find("</explanation>")
+
+    if explanation_start != -1 and explanation_end != -1:
+        return explanation_response[explanation_start + 13:explanation_end].strip()
+    return explanation_response.strip()
+
+
+async def _phase2_mapping(explanation: str, folder_structure: str) -> str:
+    mapping_prompt = f"""<file_tree>
+{folder_structure}
+</file_tree>
 
 <explanation>
 {explanation}
 </explanation>
 
-<file_tree>
-{folder_structure}
-</file_tree>"""
+{SYSTEM_MAPPING_PROMPT}"""
 
-    try:
-        mapping_response = safe_llm_call(mapping_prompt)
-        
-        # Extract component mapping
-        mapping_start = mapping_response.find("<component_mapping>")
-        mapping_end = mapping_response.find("</component_mapping>")
-        
-        if mapping_start != -1 and mapping_end != -1:
-            component_mapping = mapping_response[mapping_start:mapping_end + 20]
-        else:
-            component_mapping = mapping_response.strip()
-        
-        print(f"✅ Phase 2 complete. Mapping length: {len(component_mapping)} chars")
-        
-    except Exception as e:
-        print(f"❌ Error in Phase 2: {e}")
-        component_mapping = "<component_mapping>\n</component_mapping>"
-    
-    # Phase 3: Generate Mermaid diagram
-    print("📊 Phase 3: Generating Mermaid diagram...")
+    mapping_response = await safe_llm_call(mapping_prompt)
+
+    mapping_start = mapping_response.find("<component_mapping>")
+    mapping_end = mapping_response.find("</component_mapping>")
+
+    if mapping_start != -1 and mapping_end != -1:
+        return mapping_response[mapping_start:mapping_end + 20]
+    return mapping_response.strip()
+
+
+async def _phase3_diagram(explanation: str, component_mapping: str) -> str:
     diagram_prompt = f"""{SYSTEM_DIAGRAM_PROMPT}
 
 <explanation>
@@ -115,43 +135,92 @@ def visualize_code_node(state: RepoXState) -> RepoXState:
 
 {component_mapping}"""
 
+    return _clean_mermaid(await safe_llm_call(diagram_prompt))
+
+
+async def _tree_only_diagram(folder_structure: str) -> str:
+    """Speculative fallback: a diagram inferred from the file tree alone.
+
+    Launched concurrently with the three phases; it costs one extra call
+    but turns a phase failure into a degraded diagram instead of the
+    static placeholder, and is cancelled when the main path succeeds.
+    """
+    diagram_prompt = f"""<file_tree>
+{folder_structure}
+</file_tree>
+
+<explanation>
+No architecture explanation is available. Infer the structure of the
+project from the file tree above and produce a best-effort diagram.
+</explanation>
+
+{SYSTEM_DIAGRAM_PROMPT}"""
+
+    return _clean_mermaid(await safe_llm_call(diagram_prompt))
+
+
+def _static_fallback(state: RepoXState) -> str:
+    repo_name = state.input_data.split('/')[-1] if state.input_data else "Repository"
+    return f"""flowchart TD
+    Root["📦 {repo_name}"]
+    Root --> Files["📄 Project Files"]
+    Files --> Note["See file tree for details"]
+
+    classDef default fill:#6366f1,stroke:#4f46e5,color:#fff"""
+
+
+async def visualize_code_node(state: RepoXState) -> RepoXState:
+    # Check if we have parsed data (no need for working_dir anymore)
+    if not state.parsed_data:
+        return state
+
+    repo_data = state.parsed_data.get("repo_path", {})
+    file_paths = sorted(repo_data.keys())
+
+    folder_structure = _render_file_tree(tuple(file_paths))
+    readme_content = state.readme or "No README available"
+
+    print("🎨 Using GitDiagram-style 3-phase approach...")
+
+    # The speculative tree-only diagram runs alongside the phase chain so
+    # a late failure does not pay its latency on top of three round-trips
+    fallback_task = asyncio.ensure_future(_tree_only_diagram(folder_structure))
+
+    # Phase 1: Generate explanation
+    print("📝 Phase 1: Generating architecture explanation...")
     try:
-        mermaid_response = safe_llm_call(diagram_prompt)
-        
-        # Clean up the response
-        mermaid_code = re.sub(r"<think>.*?</think>", "", mermaid_response, flags=re.DOTALL).strip()
-        
-        # Remove code fences if present
-        mermaid_code = mermaid_code.replace("```mermaid", "").replace("```", "").strip()
-        
-        # Find diagram start
-        patterns = ["flowchart TD", "flowchart LR", "flowchart TB", "graph TD", "graph LR"]
-        diagram_start = -1
-        
-        for pattern in patterns:
-            idx = mermaid_code.find(pattern)
-            if idx != -1:
-                diagram_start = idx
-                break
-        
-        if diagram_start != -1:
-            mermaid_code = mermaid_code[diagram_start:].strip()
-        
+        explanation = await _phase1_explanation(folder_structure, readme_content)
+        print(f"✅ Phase 1 complete. Explanation length: {len(explanation)} chars")
+    except Exception as e:
+        print(f"❌ Error in Phase 1: {e}")
+        explanation = "System architecture explanation not available"
+
+    # Phase 2: Map components to files
+    print("🗺️  Phase 2: Mapping components to files...")
+    try:
+        component_mapping = await _phase2_mapping(explanation, folder_structure)
+        print(f"✅ Phase 2 complete. Mapping length: {len(component_mapping)} chars")
+    except Exception as e:
+        print(f"❌ Error in Phase 2: {e}")
+        component_mapping = "<component_mapping>\n</component_mapping>"
+
+    # Phase 3: Generate Mermaid diagram
+    print("📊 Phase 3: Generating Mermaid diagram...")
+    try:
+        mermaid_code = await _phase3_diagram(explanation, component_mapping)
         print(f"✅ Phase 3 complete. Diagram length: {len(mermaid_code)} chars")
         print("🎉 Diagram generation complete!")
-        
+        fallback_task.cancel()
     except Exception as e:
         print(f"❌ Error in Phase 3: {e}")
-        # Fallback to simple diagram
-        repo_name = state.input_data.split('/')[-1] if state.input_data else "Repository"
-        mermaid_code = f"""flowchart TD
-    Root["📦 {repo_name}"]
-    Root --> Files["📄 Project Files"]
-    Files --> Note["See file tree for details"]
-    
-    classDef default fill:#6366f1,stroke:#4f46e5,color:#fff"""
+        try:
+            mermaid_code = await fallback_task
+            print("✅ Using speculative tree-only diagram as fallback")
+        except Exception as fallback_error:
+            print(f"❌ Speculative fallback also failed: {fallback_error}")
+            mermaid_code = _static_fallback(state)
 
     state.visuals = state.visuals or {}
     state.visuals["folder_structure_mermaid"] = mermaid_code
 
-    return state
\ No newline at end of file
+    return state
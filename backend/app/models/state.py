@@ -1,5 +1,5 @@
 from typing import List, Optional, Union, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation
 
 class RepoXPreferences(BaseModel):
     generate_summary: bool
@@ -7,17 +7,38 @@ class RepoXPreferences(BaseModel):
     visualize_structure: bool
 
 class RepoXState(BaseModel):
+    # Nodes mutate and copy this model constantly; skip assignment
+    # re-validation, and leave the big opaque blobs (parsed_data,
+    # files_content - potentially thousands of entries) unvalidated
+    # rather than walking every nested value on construction and copy.
+    model_config = ConfigDict(validate_assignment=False, extra="ignore",
+                              arbitrary_types_allowed=True)
+
     input_type: str
     input_data: Union[str, Dict]
     current_file_path: Optional[str] = None
-    parsed_data: Optional[Dict[str, Any]] = None
-    summaries: Dict[str, str] = Field(default_factory=dict)
-    modified_files: Dict[str, str] = Field(default_factory=dict)
+    parsed_data: Optional[SkipValidation[Dict[str, Any]]] = None
+    summaries: SkipValidation[Dict[str, str]] = Field(default_factory=dict)
+    modified_files: SkipValidation[Dict[str, str]] = Field(default_factory=dict)
     folder_tree: Optional[str] = None
     readme: Optional[str] = None
     visuals: Optional[Dict[str, str]] = None
-    readme_summaries: Optional[List[Dict[str, Any]]] = None
+    # Keyed by file path so per-file updates are O(1) dict writes instead
+    # of rebuilding a list; records still carry their "file" field
+    readme_summaries: Optional[SkipValidation[Dict[str, Dict[str, Any]]]] = None
     preferences: Optional[RepoXPreferences]
     branch: Optional[str] = None
     project_analysis: Optional[Dict[str, Any]] = None  # Project structure and detailed analysis
-    files_content: Optional[Dict[str, str]] = None  # In-memory file content: {path: content}
\ No newline at end of file
+    files_content: Optional[SkipValidation[Dict[str, str]]] = None  # In-memory file content: {path: content}
+
+    def to_api_dict(self) -> Dict[str, Any]:
+        """Shape the pipeline result the way the API layer expects it."""
+        return {
+            "readme": self.readme if self.readme is not None else "",
+            "summaries": self.summaries if self.summaries is not None else {},
+            "modified_files": self.modified_files if self.modified_files is not None else {},
+            "visuals": self.visuals if self.visuals is not None else {},
+            "folder_tree": {},  # No local paths to expose
+            "input_type": self.input_type,
+            "project_analysis": self.project_analysis,
+        }
\ No newline at end of file
@@ -5,12 +5,17 @@ This module provides JWT token verification for AWS Cognito access tokens
 with JWKS caching to improve performance and reduce API calls.
 """
 
+import asyncio
+import hashlib
 import json
+import re
 import time
+from collections import OrderedDict
 from typing import Dict, Optional, Any
 from datetime import datetime, timezone
 import requests
-from jose import jwt, JWTError
+import jwt
+from jwt import PyJWK, PyJWTError
 from fastapi import HTTPException, status
 
 
@@ -24,63 +29,148 @@ APP_CLIENT_ID = os.getenv('COGNITO_APP_CLIENT_ID', 'YOUR_APP_CLIENT_ID')
 # JWKS URL for the Cognito User Pool
 JWKS_URL = f"https://cognito-idp.{REGION}.amazonaws.com/{USERPOOL_ID}/.well-known/jwks.json"
 
-# Cache for JWKS keys (valid for 1 hour)
+# Cache for JWKS keys (valid for 1 hour). keys_by_kid holds key objects
+# constructed once per fetch, so per-request verification is a dict lookup
+# instead of an O(n) scan plus a fresh JWK->RSA construction.
 _jwks_cache = {
     'keys': None,
-    'expires_at': 0
+    'keys_by_kid': {},
+    'expires_at': 0,
+    'fetched_at': 0
 }
 
+# Single-flight guard: only one coroutine refreshes an expired JWKS cache;
+# the rest wait and reuse its result instead of issuing duplicate fetches
+_jwks_lock = asyncio.Lock()
+
+# Within this window before hard expiry, stale keys are served while a
+# background task refreshes - no request blocks on JWKS I/O
+SOFT_EXPIRY_MARGIN = 300
+
+# Floor between forced refreshes (unknown kid) so a stream of bad tokens
+# cannot hammer Cognito with fetches
+FORCED_REFRESH_MIN_INTERVAL = 30
+
+_refresh_task: Optional[asyncio.Task] = None
+
 # Cache duration in seconds (1 hour)
 CACHE_DURATION = 3600
 
+# Verified-claims LRU: repeat requests with the same Bearer token skip the
+# RSA signature check entirely. Entries live until the token's own exp or
+# this TTL, whichever comes first, and the map is cleared on JWKS refresh.
+_VERIFIED_CACHE_SIZE = 4096
+_VERIFIED_TTL = 300
+_verified_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _fetch_jwks() -> Dict[str, Any]:
+    """Blocking JWKS fetch; runs in a worker thread from the async path."""
+    response = requests.get(JWKS_URL, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def _build_keys_by_kid(jwks: Dict[str, Any]) -> Dict[str, Any]:
+    """Construct cryptography-backed key objects once per fetch, keyed by kid."""
+    keys_by_kid = {}
+    for key in jwks.get('keys', []):
+        kid = key.get('kid')
+        if not kid:
+            continue
+        try:
+            keys_by_kid[kid] = PyJWK(key).key
+        except PyJWTError:
+            # An unusable entry should not break the rest of the key set
+            continue
+    return keys_by_kid
+
+
+async def _refresh_jwks(force: bool = False) -> Dict[str, Any]:
+    """Single-flight JWKS refresh behind the lock.
+
+    With force=True the freshness check is skipped (key-rotation probe),
+    but refreshes are still floored at FORCED_REFRESH_MIN_INTERVAL apart.
+    """
+    global _jwks_cache
+
+    async with _jwks_lock:
+        # Re-check under the lock - another coroutine may have refreshed
+        # the cache while this one waited for the lock
+        current_time = time.time()
+        if _jwks_cache['keys']:
+            if not force and current_time < _jwks_cache['expires_at']:
+                return _jwks_cache['keys']
+            if force and current_time - _jwks_cache['fetched_at'] < FORCED_REFRESH_MIN_INTERVAL:
+                return _jwks_cache['keys']
+
+        try:
+            # Fetch JWKS from Cognito off the event loop
+            jwks = await asyncio.to_thread(_fetch_jwks)
+
+            # Update cache; drop verified claims so tokens signed with a
+            # rotated-out key cannot outlive the key set that vouched for them
+            _jwks_cache['keys'] = jwks
+            _jwks_cache['keys_by_kid'] = _build_keys_by_kid(jwks)
+            _jwks_cache['expires_at'] = current_time + CACHE_DURATION
+            _jwks_cache['fetched_at'] = current_time
+            _verified_cache.clear()
+
+            return jwks
+
+        except requests.RequestException as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Unable to fetch JWKS from Cognito: {str(e)}"
+            )
+
+
+async def _background_refresh() -> None:
+    try:
+        await _refresh_jwks()
+    except HTTPException:
+        # Stale keys stay in service; the next soft-expiry hit retries
+        pass
+
 
-def get_jwks() -> Dict[str, Any]:
+async def get_jwks() -> Dict[str, Any]:
     """
     Fetch JWKS (JSON Web Key Set) from AWS Cognito with caching.
-    
+
+    Stale-while-revalidate: within SOFT_EXPIRY_MARGIN of expiry the cached
+    keys are returned immediately and a background task refreshes them, so
+    after the first fetch no request ever blocks on JWKS I/O. The fetch
+    itself runs in a worker thread off the event loop.
+
     Returns:
         Dict containing the JWKS keys
-        
+
     Raises:
         HTTPException: If unable to fetch JWKS from Cognito
     """
-    global _jwks_cache
-    
-    # Check if cache is still valid
+    global _refresh_task
+
+    # Fast path: no lock while the cache is warm
     current_time = time.time()
     if _jwks_cache['keys'] and current_time < _jwks_cache['expires_at']:
+        if (current_time > _jwks_cache['expires_at'] - SOFT_EXPIRY_MARGIN
+                and (_refresh_task is None or _refresh_task.done())):
+            _refresh_task = asyncio.create_task(_background_refresh())
         return _jwks_cache['keys']
-    
-    try:
-        # Fetch JWKS from Cognito
-        response = requests.get(JWKS_URL, timeout=10)
-        response.raise_for_status()
-        
-        jwks = response.json()
-        
-        # Update cache
-        _jwks_cache['keys'] = jwks
-        _jwks_cache['expires_at'] = current_time + CACHE_DURATION
-        
-        return jwks
-        
-    except requests.RequestException as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Unable to fetch JWKS from Cognito: {str(e)}"
-        )
 
+    return await _refresh_jwks()
 
-def get_signing_key(token: str) -> Dict[str, Any]:
+
+async def get_signing_key(token: str) -> Any:
     """
     Get the signing key for the JWT token from JWKS.
-    
+
     Args:
         token: JWT token to get signing key for
-        
+
     Returns:
-        Dict containing the signing key
-        
+        The pre-constructed key object for the token's kid
+
     Raises:
         HTTPException: If unable to find appropriate signing key
     """
@@ -95,46 +185,65 @@ def get_signing_key(token: str) -> Dict[str, Any]:
                 detail="Token missing key ID (kid) in header"
             )
             
-    except JWTError as e:
+    except PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token header: {str(e)}"
         )
     
-    # Get JWKS and find the matching key
-    jwks = get_jwks()
-    
-    for key in jwks.get('keys', []):
-        if key.get('kid') == kid:
-            return key
-    
+    # Ensure the cache is fresh, then resolve the kid in one lookup
+    await get_jwks()
+
+    key = _jwks_cache['keys_by_kid'].get(kid)
+    if key is None:
+        # An unknown kid can mean Cognito rotated keys mid-window; force
+        # one (rate-limited) refresh before rejecting the token
+        await _refresh_jwks(force=True)
+        key = _jwks_cache['keys_by_kid'].get(kid)
+
+    if key is not None:
+        return key
+
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail=f"Unable to find signing key with kid: {kid}"
     )
 
 
-def verify_cognito_token(token: str) -> Dict[str, Any]:
+async def verify_cognito_token(token: str) -> Dict[str, Any]:
     """
     Verify AWS Cognito JWT access token and return claims.
-    
+
+    The RS256 signature check is CPU work worth a few milliseconds, so it
+    also runs in a worker thread rather than on the event loop.
+
     Args:
         token: JWT access token from Cognito
-        
+
     Returns:
         Dict containing the verified token claims
-        
+
     Raises:
         HTTPException: If token is invalid, expired, or verification fails
     """
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    entry = _verified_cache.get(cache_key)
+    if entry is not None:
+        expires_at, cached_claims = entry
+        if time.time() < expires_at:
+            _verified_cache.move_to_end(cache_key)
+            return cached_claims
+        _verified_cache.pop(cache_key, None)
+
     try:
         # Get the signing key for this token
-        signing_key = get_signing_key(token)
-        
+        signing_key = await get_signing_key(token)
+
         # Verify and decode the token
         # Note: We don't verify the audience here as Cognito access tokens
         # don't always include the client_id in the aud claim
-        claims = jwt.decode(
+        claims = await asyncio.to_thread(
+            jwt.decode,
             token,
             signing_key,
             algorithms=['RS256'],
@@ -143,9 +252,7 @@ def verify_cognito_token(token: str) -> Dict[str, Any]:
                 'verify_exp': True,
                 'verify_iat': True,
                 'verify_aud': False,  # Cognito access tokens may not have aud claim
-                'verify_iss': True,
-                'require_exp': True,
-                'require_iat': True
+                'require': ['exp', 'iat']
             }
         )
         
@@ -170,26 +277,38 @@ def verify_cognito_token(token: str) -> Dict[str, Any]:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token client ID does not match"
             )
-        
+
+        _verified_cache[cache_key] = (
+            min(float(claims.get('exp', 0)), time.time() + _VERIFIED_TTL),
+            claims
+        )
+        if len(_verified_cache) > _VERIFIED_CACHE_SIZE:
+            _verified_cache.popitem(last=False)
+
         return claims
         
-    except JWTError as e:
+    except PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Token verification failed: {str(e)}"
         )
 
 
+# One C-level scan validates the scheme (case-insensitive per RFC 6750)
+# and captures the token, replacing the startswith/slice/empty-check chain
+_BEARER_RE = re.compile(r"^[Bb]earer\s+(\S+)\s*$")
+
+
 def extract_bearer_token(authorization: Optional[str]) -> str:
     """
     Extract Bearer token from Authorization header.
-    
+
     Args:
         authorization: Authorization header value
-        
+
     Returns:
         The extracted JWT token
-        
+
     Raises:
         HTTPException: If Authorization header is missing or malformed
     """
@@ -199,26 +318,16 @@ def extract_bearer_token(authorization: Optional[str]) -> str:
             detail="Authorization header is required",
             headers={"WWW-Authenticate": "Bearer"}
         )
-    
-    # Check if it's a Bearer token
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header must start with 'Bearer '",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-    
-    # Extract the token
-    token = authorization[7:]  # Remove "Bearer " prefix
-    
-    if not token:
+
+    match = _BEARER_RE.match(authorization)
+    if not match:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Bearer token is required",
+            detail="Authorization header must be of the form 'Bearer <token>'",
             headers={"WWW-Authenticate": "Bearer"}
         )
-    
-    return token
+
+    return match.group(1)
 
 
 def get_user_info_from_token(claims: Dict[str, Any]) -> Dict[str, Any]:
@@ -8,8 +8,12 @@ This module provides functions to interact with DynamoDB for:
 """
 
 import os
+import threading
+import time
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 import logging
@@ -24,13 +28,25 @@ load_dotenv()
 DYNAMODB_TABLE_NAME = os.getenv('DYNAMODB_TABLE_NAME', 'rep')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 
-# Initialize DynamoDB client
+# GSI on (userId, repoUrl) used for direct repo-by-URL lookups; must exist
+# on the table (the table itself is provisioned outside this codebase)
+REPO_URL_INDEX_NAME = os.getenv('DYNAMODB_REPO_URL_INDEX', 'UserRepoIndex')
+
+# Initialize DynamoDB client. The connection pool is sized for concurrent
+# request handlers sharing this module-level resource (urllib3 defaults to
+# 10, which serializes calls under load), adaptive retry mode backs off on
+# throttling, and TCP keepalive avoids re-establishing idle connections.
 dynamodb = boto3.resource(
     'dynamodb',
     region_name=AWS_REGION,
     aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
     aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-    aws_session_token=os.getenv('AWS_SESSION_TOKEN')  # Required for Learners Lab
+    aws_session_token=os.getenv('AWS_SESSION_TOKEN'),  # Required for Learners Lab
+    config=Config(
+        max_pool_connections=64,
+        retries={'max_attempts': 3, 'mode': 'adaptive'},
+        tcp_keepalive=True
+    )
 )
 
 # Get table reference
@@ -44,6 +60,38 @@ def get_current_timestamp() -> str:
 
 # ==================== USER PREFERENCES ====================
 
+# Preferences are read on nearly every request but change rarely, so a
+# short TTL cache absorbs the repeated get_item calls. Saves write through
+# the cache, so a user sees their own change immediately; other processes
+# converge within the TTL. The lock is threading (not asyncio) because
+# these helpers run in worker threads via asyncio.to_thread.
+_PREFS_CACHE_SIZE = 10000
+_PREFS_TTL = 60
+_prefs_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_prefs_lock = threading.Lock()
+
+
+def _prefs_cache_get(user_id: str) -> Optional[Dict[str, Any]]:
+    with _prefs_lock:
+        entry = _prefs_cache.get(user_id)
+        if entry is None:
+            return None
+        expires_at, preferences = entry
+        if time.time() >= expires_at:
+            _prefs_cache.pop(user_id, None)
+            return None
+        _prefs_cache.move_to_end(user_id)
+        return preferences
+
+
+def _prefs_cache_put(user_id: str, preferences: Dict[str, Any]) -> None:
+    with _prefs_lock:
+        _prefs_cache[user_id] = (time.time() + _PREFS_TTL, preferences)
+        _prefs_cache.move_to_end(user_id)
+        if len(_prefs_cache) > _PREFS_CACHE_SIZE:
+            _prefs_cache.popitem(last=False)
+
+
 def save_user_preferences(user_id: str, preferences: Dict[str, Any]) -> Dict[str, Any]:
     """
     Save user preferences to DynamoDB.
@@ -67,7 +115,10 @@ def save_user_preferences(user_id: str, preferences: Dict[str, Any]) -> Dict[str
         }
         
         table.put_item(Item=item)
-        
+
+        # Write through so the user's own reads reflect the save immediately
+        _prefs_cache_put(user_id, preferences)
+
         logger.info(f"Saved preferences for user: {user_id}")
         return {'status': 'success', 'message': 'Preferences saved'}
         
@@ -86,6 +137,10 @@ def get_user_preferences(user_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dict containing user preferences or None if not found
     """
+    cached = _prefs_cache_get(user_id)
+    if cached is not None:
+        return cached
+
     try:
         response = table.get_item(
             Key={
@@ -93,11 +148,13 @@ def get_user_preferences(user_id: str) -> Optional[Dict[str, Any]]:
                 'recordId': 'PREFERENCES'
             }
         )
-        
+
         item = response.get('Item')
         if item:
-            return item.get('preferences', {})
-        
+            preferences = item.get('preferences', {})
+            _prefs_cache_put(user_id, preferences)
+            return preferences
+
         return None
         
     except Exception as e:
@@ -107,6 +164,62 @@ def get_user_preferences(user_id: str) -> Optional[Dict[str, Any]]:
 
 # ==================== DOCUMENTATION HISTORY ====================
 
+def build_documentation_item(
+    user_id: str,
+    repo_url: str,
+    readme_content: str,
+    summaries: Dict[str, str],
+    metadata: Optional[Dict[str, Any]] = None,
+    record_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build a DynamoDB item for a documentation record.
+
+    Shared by the single-item and batch save paths so both write
+    identically shaped items.
+
+    Args:
+        user_id: Cognito user ID
+        repo_url: Repository URL
+        readme_content: Generated README content
+        summaries: File summaries
+        metadata: Additional metadata (visuals, commit info, etc.)
+        record_id: Optional existing record ID for updates (if None, creates new record)
+
+    Returns:
+        Dict ready to pass as Item to put_item
+    """
+    # Use existing record_id for updates, or generate new one for new records
+    is_update = record_id is not None
+    if not record_id:
+        record_id = f"DOC#{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}#{uuid.uuid4().hex[:8]}"
+
+    # Extract commit SHA and branch from metadata
+    last_commit_sha = metadata.get('last_commit_sha') if metadata else None
+    branch = metadata.get('branch', 'main') if metadata else 'main'
+
+    item = {
+        'userId': user_id,
+        'recordId': record_id,
+        'recordType': 'documentation',
+        'repoUrl': repo_url,
+        'readmeContent': readme_content,
+        'summaries': summaries,
+        'metadata': metadata or {},
+        'lastCommitSha': last_commit_sha,
+        'lastSyncedAt': get_current_timestamp(),
+        'branch': branch,
+        'hasUpdates': False,  # Reset flag after regeneration
+        'updatedAt': get_current_timestamp()
+    }
+
+    # Add createdAt only for new records
+    if not is_update:
+        item['createdAt'] = get_current_timestamp()
+
+    return item
+
+
 def save_documentation_record(
     user_id: str,
     repo_url: str,
@@ -130,36 +243,19 @@ def save_documentation_record(
         Dict with save status and record ID
     """
     try:
-        # Use existing record_id for updates, or generate new one for new records
         is_update = record_id is not None
-        if not record_id:
-            record_id = f"DOC#{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}#{uuid.uuid4().hex[:8]}"
-        
-        # Extract commit SHA and branch from metadata
-        last_commit_sha = metadata.get('last_commit_sha') if metadata else None
-        branch = metadata.get('branch', 'main') if metadata else 'main'
-        
-        item = {
-            'userId': user_id,
-            'recordId': record_id,
-            'recordType': 'documentation',
-            'repoUrl': repo_url,
-            'readmeContent': readme_content,
-            'summaries': summaries,
-            'metadata': metadata or {},
-            'lastCommitSha': last_commit_sha,
-            'lastSyncedAt': get_current_timestamp(),
-            'branch': branch,
-            'hasUpdates': False,  # Reset flag after regeneration
-            'updatedAt': get_current_timestamp()
-        }
-        
-        # Add createdAt only for new records
-        if not is_update:
-            item['createdAt'] = get_current_timestamp()
-        
+        item = build_documentation_item(
+            user_id=user_id,
+            repo_url=repo_url,
+            readme_content=readme_content,
+            summaries=summaries,
+            metadata=metadata,
+            record_id=record_id
+        )
+        record_id = item['recordId']
+
         table.put_item(Item=item)
-        
+
         action = "Updated" if is_update else "Saved"
         logger.info(f"{action} documentation record for user: {user_id}, repo: {repo_url}, recordId: {record_id}")
         return {
@@ -174,39 +270,145 @@ def save_documentation_record(
         return {'status': 'error', 'message': str(e)}
 
 
+def save_documentation_records_batch(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Save multiple documentation records in one pass using BatchWriteItem.
+
+    The batch writer groups puts into 25-item BatchWriteItem requests and
+    retries unprocessed items automatically, so saving N records costs
+    ~N/25 round trips instead of N sequential put_item calls.
+
+    Args:
+        records: List of dicts with the same keys as save_documentation_record
+                 takes as arguments (user_id, repo_url, readme_content,
+                 summaries, and optionally metadata and record_id)
+
+    Returns:
+        Dict with save status and the record IDs written
+    """
+    try:
+        record_ids = []
+
+        # overwrite_by_pkeys dedupes same-key puts within a batch request,
+        # which BatchWriteItem would otherwise reject outright
+        with table.batch_writer(overwrite_by_pkeys=['userId', 'recordId']) as batch:
+            for record in records:
+                item = build_documentation_item(
+                    user_id=record['user_id'],
+                    repo_url=record['repo_url'],
+                    readme_content=record['readme_content'],
+                    summaries=record['summaries'],
+                    metadata=record.get('metadata'),
+                    record_id=record.get('record_id')
+                )
+                batch.put_item(Item=item)
+                record_ids.append(item['recordId'])
+
+        logger.info(f"Saved {len(record_ids)} documentation records in batch")
+        return {
+            'status': 'success',
+            'message': f'{len(record_ids)} documentation records saved',
+            'recordIds': record_ids
+        }
+
+    except Exception as e:
+        logger.error(f"Error batch saving documentation records: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+# Attributes the history list actually renders. Projecting these skips the
+# readmeContent/summaries payloads, which dominate item size, so the query
+# reads and transfers a fraction of the bytes. All names are aliased via
+# ExpressionAttributeNames to sidestep DynamoDB's reserved-word list.
+_HISTORY_METADATA_ATTRS = [
+    'recordId', 'repoUrl', 'createdAt', 'updatedAt',
+    'branch', 'hasUpdates', 'lastCommitSha'
+]
+
+
 def get_user_documentation_history(
     user_id: str,
-    limit: int = 10
+    limit: int = 10,
+    metadata_only: bool = False
 ) -> List[Dict[str, Any]]:
     """
     Get documentation generation history for a user.
-    
+
     Args:
         user_id: Cognito user ID
         limit: Maximum number of records to return
-        
+        metadata_only: If True, project only list-view attributes instead of
+                       returning full records with README content and summaries
+
     Returns:
         List of documentation records
     """
     try:
-        response = table.query(
-            KeyConditionExpression=Key('userId').eq(user_id) & Key('recordId').begins_with('DOC#'),
-            FilterExpression='recordType = :type',
-            ExpressionAttributeValues={':type': 'documentation'},
-            Limit=limit,
-            ScanIndexForward=False  # Most recent first
-        )
-        
-        items = response.get('Items', [])
-        
-        # Return full documentation records
-        return items
-        
+        query_kwargs = {
+            'KeyConditionExpression': Key('userId').eq(user_id) & Key('recordId').begins_with('DOC#'),
+            'FilterExpression': 'recordType = :type',
+            'ExpressionAttributeValues': {':type': 'documentation'},
+            'Limit': limit,
+            'ScanIndexForward': False  # Most recent first
+        }
+
+        if metadata_only:
+            query_kwargs['ProjectionExpression'] = ', '.join(
+                f'#attr{i}' for i in range(len(_HISTORY_METADATA_ATTRS))
+            )
+            query_kwargs['ExpressionAttributeNames'] = {
+                f'#attr{i}': name for i, name in enumerate(_HISTORY_METADATA_ATTRS)
+            }
+
+        response = table.query(**query_kwargs)
+
+        return response.get('Items', [])
+
     except Exception as e:
         logger.error(f"Error getting documentation history: {str(e)}")
         return []
 
 
+def get_user_documentation_history_iter(user_id: str, page_size: int = 50):
+    """
+    Iterate over a user's full documentation history, one page at a time.
+
+    Follows LastEvaluatedKey so callers can walk histories larger than a
+    single 1 MB query response without loading everything into memory.
+
+    Args:
+        user_id: Cognito user ID
+        page_size: Maximum number of records fetched per query
+
+    Yields:
+        Documentation records, most recent first
+    """
+    exclusive_start_key = None
+    while True:
+        try:
+            query_kwargs = {
+                'KeyConditionExpression': Key('userId').eq(user_id) & Key('recordId').begins_with('DOC#'),
+                'FilterExpression': 'recordType = :type',
+                'ExpressionAttributeValues': {':type': 'documentation'},
+                'Limit': page_size,
+                'ScanIndexForward': False
+            }
+            if exclusive_start_key:
+                query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+
+            response = table.query(**query_kwargs)
+
+        except Exception as e:
+            logger.error(f"Error paging documentation history: {str(e)}")
+            return
+
+        yield from response.get('Items', [])
+
+        exclusive_start_key = response.get('LastEvaluatedKey')
+        if not exclusive_start_key:
+            return
+
+
 def get_documentation_by_id(user_id: str, record_id: str) -> Optional[Dict[str, Any]]:
     """
     Get a specific documentation record by ID.
@@ -354,17 +556,20 @@ def get_repo_by_url(user_id: str, repo_url: str) -> Optional[Dict[str, Any]]:
         Documentation record or None if not found
     """
     try:
-        # Query all documentation records for this user
+        # The UserRepoIndex GSI (partition: userId, sort: repoUrl) lets the
+        # lookup hit the exact item directly. The previous query read every
+        # DOC# item for the user and filtered on repoUrl client-side after
+        # paying for the full read.
         response = table.query(
-            KeyConditionExpression=Key('userId').eq(user_id) & Key('recordId').begins_with('DOC#'),
-            FilterExpression='repoUrl = :url',
-            ExpressionAttributeValues={':url': repo_url}
+            IndexName=REPO_URL_INDEX_NAME,
+            KeyConditionExpression=Key('userId').eq(user_id) & Key('repoUrl').eq(repo_url),
+            Limit=1
         )
-        
+
         items = response.get('Items', [])
         if items:
-            return items[0]  # Return the first match
-        
+            return items[0]
+
         return None
         
     except Exception as e:
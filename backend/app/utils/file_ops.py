@@ -94,8 +94,10 @@ def git_clone_repo(repo_url: str, repo_id: str, branch: str = "main") -> str:
     logger.info(f"Cloning repository from {repo_url} to {temp_dir}...")
     
     try:
-        # Clone with the specified branch
-        repo = Repo.clone_from(repo_url, temp_dir, branch=branch)
+        # Shallow partial clone: history and blobs outside the checkout are
+        # never transferred, which is all a single-file commit needs
+        repo = Repo.clone_from(repo_url, temp_dir, branch=branch,
+                               depth=1, filter="blob:none", single_branch=True)
         logger.info(f"✓ Successfully cloned repository (branch: {branch})")
         return temp_dir
     except GitCommandError as e:
@@ -105,7 +107,8 @@ def git_clone_repo(repo_url: str, repo_id: str, branch: str = "main") -> str:
             try:
                 import shutil
                 shutil.rmtree(temp_dir, ignore_errors=True)
-                repo = Repo.clone_from(repo_url, temp_dir, branch="main")
+                repo = Repo.clone_from(repo_url, temp_dir, branch="main",
+                                       depth=1, filter="blob:none", single_branch=True)
                 logger.info("✓ Successfully cloned repository (branch: main)")
                 return temp_dir
             except GitCommandError:
@@ -116,7 +119,8 @@ def git_clone_repo(repo_url: str, repo_id: str, branch: str = "main") -> str:
         try:
             import shutil
             shutil.rmtree(temp_dir, ignore_errors=True)
-            repo = Repo.clone_from(repo_url, temp_dir, branch="master")
+            repo = Repo.clone_from(repo_url, temp_dir, branch="master",
+                                   depth=1, filter="blob:none", single_branch=True)
             logger.info("✓ Successfully cloned repository (branch: master)")
             return temp_dir
         except GitCommandError as final_error:
@@ -9,6 +9,7 @@ This module provides functions to interact with GitHub's REST API to:
 import os
 import logging
 import requests
+import tarfile
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import base64
@@ -16,6 +17,11 @@ import tempfile
 
 logger = logging.getLogger(__name__)
 
+# Binary extensions skipped during repo download; a module-level tuple lets
+# str.endswith do one C-level check instead of a per-file any() loop
+SKIP_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf', '.zip',
+                   '.tar', '.gz', '.exe', '.dll', '.so', '.dylib', '.bin')
+
 
 def parse_github_url(repo_url: str) -> Tuple[str, str]:
     """
@@ -189,10 +195,49 @@ def fetch_file_content(owner: str, repo: str, file_path: str, branch: str = "mai
     return None
 
 
+def _extract_tar_stream(fileobj) -> Dict[str, str]:
+    """Decode text files out of a streamed .tar.gz without buffering it.
+
+    Entries are processed as bytes arrive off the socket (r|gz mode needs
+    no seeking), so peak memory is one member at a time instead of the
+    whole compressed-plus-decompressed archive.
+    """
+    files_content = {}
+    with tarfile.open(fileobj=fileobj, mode='r|gz') as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+
+            # Strip the "{repo}-{sha}/" prefix GitHub puts on every entry
+            file_path = member.name.partition('/')[2]
+            if not file_path:
+                continue
+
+            if file_path.lower().endswith(SKIP_EXTENSIONS):
+                logger.debug(f"Skipping binary file: {file_path}")
+                continue
+            if member.size > 1_000_000:
+                logger.debug(f"Skipping large file: {file_path} ({member.size} bytes)")
+                continue
+
+            extracted = tar.extractfile(member)
+            if extracted is None:
+                continue
+            try:
+                files_content[file_path] = extracted.read().decode('utf-8')
+            except UnicodeDecodeError:
+                logger.debug(f"Could not decode as UTF-8: {file_path}")
+    return files_content
+
+
 def download_repo_to_memory(repo_url: str, branch: str = "main") -> Dict[str, str]:
     """
     Download repository files to an in-memory dictionary structure.
     
+    Streams the repository tarball in a single request and decodes entries
+    on the fly. Falls back to per-file Trees API downloads if the tarball
+    endpoint is unavailable.
+    
     Args:
         repo_url: GitHub repository URL
         branch: Branch name (default: main)
@@ -213,6 +258,35 @@ def download_repo_to_memory(repo_url: str, branch: str = "main") -> Dict[str, st
     
     logger.info(f"📥 Downloading repository: {owner}/{repo} (branch: {branch})")
     
+    headers = {'Accept': 'application/vnd.github.v3+json'}
+    if token:
+        headers['Authorization'] = f'token {token}'
+    
+    # One tarball request replaces one API round-trip per file
+    attempts = [branch]
+    if branch in ('main', 'master'):
+        attempts += [alt for alt in ('main', 'master', 'develop') if alt != branch]
+    
+    for attempt_branch in attempts:
+        tarball_url = f'https://api.github.com/repos/{owner}/{repo}/tarball/{attempt_branch}'
+        try:
+            response = requests.get(tarball_url, headers=headers, timeout=60, stream=True)
+            if response.status_code == 404:
+                logger.info(f"Branch '{attempt_branch}' not found for tarball download")
+                continue
+            response.raise_for_status()
+            files_content = _extract_tar_stream(response.raw)
+            logger.info(f"✅ Streamed {len(files_content)} text files from tarball")
+            return files_content
+        except (tarfile.TarError, requests.RequestException) as e:
+            logger.warning(f"Tarball download failed ({e}); falling back to Trees API")
+            break
+    
+    return _download_repo_via_api(owner, repo, branch, token)
+
+
+def _download_repo_via_api(owner: str, repo: str, branch: str, token: Optional[str]) -> Dict[str, str]:
+    """Per-file download through the Trees API (fallback path)."""
     # Fetch the complete tree
     tree_data = fetch_repo_tree(owner, repo, branch, token)
     
@@ -233,9 +307,7 @@ def download_repo_to_memory(repo_url: str, branch: str = "main") -> Dict[str, st
         file_path = item['path']
         
         # Skip binary files and common exclusions
-        skip_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf', '.zip', 
-                          '.tar', '.gz', '.exe', '.dll', '.so', '.dylib', '.bin'}
-        if any(file_path.lower().endswith(ext) for ext in skip_extensions):
+        if file_path.lower().endswith(SKIP_EXTENSIONS):
             logger.debug(f"Skipping binary file: {file_path}")
             continue
         
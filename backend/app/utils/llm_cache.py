@@ -0,0 +1,216 @@
+"""
+Persistent LLM response cache.
+
+Re-runs on the same repo (common during development) repay full LLM latency
+and token cost for files that have not changed. This module caches responses
+keyed by an exact SHA-256 over (prompt, language, model) so repeat prompts
+skip the round-trip entirely.
+
+Backed by stdlib sqlite3 so no extra dependency is required. If the cache
+cannot be opened (read-only filesystem, etc.) it degrades to a no-op so the
+pipeline keeps working.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# orjson serializes several times faster than stdlib json; fall back
+# silently when it is not installed (same pattern as dotenv/LangChain)
+try:
+    import orjson  # type: ignore
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def json_loads(data):
+        return orjson.loads(data)
+
+except Exception:
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, sort_keys=True).encode("utf-8")
+
+    def json_dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def json_loads(data):
+        return json.loads(data)
+
+# Responses are 2-10KB of natural-language text that compresses 3-5x;
+# prefer zstd (fast, better ratio) and fall back to stdlib zlib when it
+# is not installed. A one-byte marker records which codec wrote the row.
+try:
+    import zstandard as zstd  # type: ignore
+    _zstd_c = zstd.ZstdCompressor(level=3)
+    _zstd_d = zstd.ZstdDecompressor()
+except Exception:
+    _zstd_c = None
+    _zstd_d = None
+
+_MARK_ZSTD = b"\x01"
+_MARK_ZLIB = b"\x02"
+
+
+def _compress(text: str) -> bytes:
+    raw = text.encode("utf-8")
+    if _zstd_c is not None:
+        return _MARK_ZSTD + _zstd_c.compress(raw)
+    return _MARK_ZLIB + zlib.compress(raw, 6)
+
+
+def _decompress(value) -> Optional[str]:
+    if isinstance(value, str):
+        return value  # legacy uncompressed row
+    marker, payload = value[:1], value[1:]
+    if marker == _MARK_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == _MARK_ZSTD and _zstd_d is not None:
+        return _zstd_d.decompress(payload).decode("utf-8")
+    return None  # written by an unavailable codec - treat as a miss
+
+
+# Cached responses are kept for a week - long enough for dev iteration,
+# short enough that prompt/model changes don't serve stale output forever.
+DEFAULT_TTL_SECONDS = 7 * 86400
+
+# Row cap for LRU eviction; checked every _EVICT_EVERY writes so steady
+# state pays a count query only occasionally
+MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "50000"))
+_EVICT_EVERY = 256
+
+
+def _default_cache_path() -> str:
+    # Keep the cache next to the backend package (same pattern as .ClonedRepos)
+    base = Path(__file__).resolve().parents[2] / ".llm_cache"
+    base.mkdir(parents=True, exist_ok=True)
+    return str(base / "responses.sqlite3")
+
+
+class LLMCache:
+    """Exact-match response cache with hit/miss stats."""
+
+    def __init__(self, path: Optional[str] = None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_evict = 0
+
+        if os.getenv("LLM_CACHE_DISABLED"):
+            logger.info("LLM cache disabled via LLM_CACHE_DISABLED")
+            return
+
+        try:
+            self.path = path or os.getenv("LLM_CACHE_PATH") or _default_cache_path()
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response NOT NULL, expires_at REAL NOT NULL, "
+                "last_used REAL NOT NULL DEFAULT 0)"
+            )
+            try:
+                # Databases created before LRU tracking lack the column
+                self._conn.execute("ALTER TABLE responses ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"LLM cache unavailable, continuing without it: {e}")
+            self._conn = None
+
+    @staticmethod
+    def make_key(prompt: str, language: str = "", model: str = "") -> str:
+        payload = _dumps_bytes({"prompt": prompt, "language": language, "model": model})
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+                    )
+                    self._conn.commit()
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+        if row is not None:
+            response = _decompress(row[0])
+            if response is not None:
+                self.stats["hits"] += 1
+                return response
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, response: str) -> None:
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                now = time.time()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(_compress(response)), now + self.ttl, now)
+                )
+                self._conn.commit()
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= _EVICT_EVERY:
+                    self._writes_since_evict = 0
+                    self._evict_lru()
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict_lru(self) -> None:
+        """Drop least-recently-used rows beyond MAX_ROWS. Caller holds the lock."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - MAX_ROWS
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+            logger.info(f"LLM cache evicted {excess} LRU rows (cap {MAX_ROWS})")
+
+    def log_stats(self) -> None:
+        total = self.stats["hits"] + self.stats["misses"]
+        if total:
+            logger.info(
+                f"LLM cache: {self.stats['hits']} hits / {self.stats['misses']} misses "
+                f"({100 * self.stats['hits'] / total:.0f}% hit rate)"
+            )
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_cache() -> LLMCache:
+    """Shared process-wide cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
@@ -6,6 +6,7 @@ external dependencies or API keys.
 """
 
 from typing import Optional
+import asyncio
 import os
 
 # Try to load .env if python-dotenv is present; otherwise skip silently
@@ -38,9 +39,16 @@ try:
 
     _parser = StrOutputParser()
 
+    # Build the chains once at import time. The model objects hold the
+    # provider HTTP client and its connection pool, so reusing them keeps
+    # connections warm instead of paying TLS/DNS setup on every call.
+    _readme_chain = llm_readme | _parser
+    _summary_chain = llm_summary | _parser
+    _chains = {id(llm_readme): _readme_chain, id(llm_summary): _summary_chain}
+
     def _invoke_llm(model, prompt: str, system: str) -> str:
         messages = [("system", system), ("user", prompt)]
-        chain = model | StrOutputParser()  # parse to string
+        chain = _chains.get(id(model)) or (model | _parser)
         return chain.invoke(messages)
 
 except Exception:
@@ -65,6 +73,35 @@ def get_llm_response_summary(prompt: str, language: str) -> str:
     return _invoke_llm(llm_summary, prompt, system)
 
 
+def get_llm_response_summary_stream(prompt: str, language: str):
+    """Stream the summary response chunk by chunk.
+
+    Yields partial text as it arrives so callers can overlap parsing and
+    progress reporting with network time. The local fallback yields the
+    whole response in one chunk.
+    """
+    system = (
+        f"You are a highly skilled senior {language} software engineer. "
+        f"Always write precise, technical, and concise output without adding explanations or extra commentary."
+    )
+    if _USE_FAKE:
+        yield _invoke_llm(llm_summary, prompt, system)
+        return
+
+    messages = [("system", system), ("user", prompt)]
+    for chunk in _summary_chain.stream(messages):
+        yield chunk
+
+
+async def get_llm_response_summary_async(prompt: str, language: str) -> str:
+    """Async variant of get_llm_response_summary.
+
+    The underlying LangChain invoke is synchronous, so we run it in a
+    worker thread to avoid blocking the event loop.
+    """
+    return await asyncio.to_thread(get_llm_response_summary, prompt, language)
+
+
 def get_llm_response_readme(prompt: str) -> str:
     system = (
         "You are a technical writer and documentation specialist. "
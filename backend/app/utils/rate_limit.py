@@ -0,0 +1,75 @@
+"""Proactive client-side rate limiting for LLM calls.
+
+Providers enforce per-model RPM/TPM quotas; reacting to 429s costs a full
+round-trip plus exponential-backoff tails. A token bucket sized to the
+quota throttles submissions before the provider rejects them, so bursts
+queue locally. One bucket per model, shared by every caller of that model,
+keeps the accounting honest across nodes.
+"""
+
+import os
+import threading
+import time
+
+# Fallback quota when no env override exists for a limiter; tune per plan
+# via {NAME}_RPM / {NAME}_TPM (e.g. ANALYSIS_RPM, SUMMARY_TPM)
+_DEFAULT_RPM = 300
+_DEFAULT_TPM = 200_000
+
+
+class TokenBucket:
+    """Proactive request/token rate limiter.
+
+    Tracks remaining request and token capacity on a monotonic clock and
+    tells callers how long to wait before their call fits the quota, so
+    bursts queue locally instead of burning round-trips on 429 rejections.
+    Capacity may go negative - that forms the virtual queue for callers
+    already committed.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, token_cost: int) -> float:
+        """Reserve one request plus token_cost tokens; return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.last
+            self.last = now
+            self.requests = min(float(self.rpm), self.requests + elapsed * self.rpm / 60.0)
+            self.tokens = min(float(self.tpm), self.tokens + elapsed * self.tpm / 60.0)
+
+            need_req = max(0.0, (1.0 - self.requests) * 60.0 / self.rpm)
+            need_tok = max(0.0, (token_cost - self.tokens) * 60.0 / self.tpm)
+
+            self.requests -= 1.0
+            self.tokens -= token_cost
+            return max(need_req, need_tok)
+
+
+def estimate_tokens(prompt: str) -> int:
+    # Rough ~4 chars/token estimate is plenty for quota accounting
+    return len(prompt) // 4
+
+
+_limiters: dict = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> TokenBucket:
+    """Per-model singleton bucket, sized from {NAME}_RPM / {NAME}_TPM env."""
+    bucket = _limiters.get(name)
+    if bucket is None:
+        with _limiters_lock:
+            bucket = _limiters.get(name)
+            if bucket is None:
+                prefix = name.upper()
+                rpm = int(os.getenv(f"{prefix}_RPM", str(_DEFAULT_RPM)))
+                tpm = int(os.getenv(f"{prefix}_TPM", str(_DEFAULT_TPM)))
+                bucket = _limiters[name] = TokenBucket(rpm, tpm)
+    return bucket
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import logging
 import requests
@@ -17,7 +18,7 @@ from app.utils.github_changes import check_repo_updates, get_latest_commit_info
 from fastapi.responses import StreamingResponse
 import io, os
 import zipfile
-import json
+from app.utils.llm_cache import json_loads
 from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 import boto3
@@ -32,10 +33,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 load_dotenv()
+
+# orjson serializes the large project_analysis payloads several times faster
+# than the stdlib encoder; fall back to the default response class without it
+try:
+    from fastapi.responses import ORJSONResponse as _DefaultResponse
+    import orjson  # noqa: F401 - ORJSONResponse needs it at render time
+except ImportError:
+    from fastapi.responses import JSONResponse as _DefaultResponse
+
 app = FastAPI(
     title="RepoX Backend API",
     description="Backend API for RepoX with AWS Cognito authentication",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=_DefaultResponse
 )
 
 # Configure CORS to allow requests from React frontend running locally
@@ -57,7 +68,7 @@ USER_POOL_ID = os.getenv('COGNITO_USER_POOL_ID', 'us-east-1_YOUR_USERPOOL_ID')
 APP_CLIENT_ID = os.getenv('COGNITO_APP_CLIENT_ID', 'YOUR_APP_CLIENT_ID')
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     """
     Dependency to get current authenticated user from JWT token.
     
@@ -75,7 +86,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     token = credentials.credentials
     
     # Verify the token with Cognito
-    claims = verify_cognito_token(token)
+    claims = await verify_cognito_token(token)
     
     # Extract user information
     user_info = get_user_info_from_token(claims)
@@ -420,7 +431,7 @@ async def test_dynamodb_connection(current_user: Dict[str, Any] = Depends(get_cu
     Returns:
         Dict with connection status
     """
-    result = test_connection()
+    result = await asyncio.to_thread(test_connection)
     return result
 
 
@@ -440,7 +451,7 @@ async def save_preferences(
         Dict with save status
     """
     user_id = current_user.get('sub')
-    result = save_user_preferences(user_id, preferences)
+    result = await asyncio.to_thread(save_user_preferences, user_id, preferences)
     return result
 
 
@@ -456,7 +467,7 @@ async def get_preferences(current_user: Dict[str, Any] = Depends(get_current_use
         Dict containing user preferences
     """
     user_id = current_user.get('sub')
-    preferences = get_user_preferences(user_id)
+    preferences = await asyncio.to_thread(get_user_preferences, user_id)
     
     if preferences is None:
         # Return default preferences if none exist
@@ -472,20 +483,30 @@ async def get_preferences(current_user: Dict[str, Any] = Depends(get_current_use
 @app.get("/user/history")
 async def get_history(
     limit: int = 10,
+    fields: Optional[str] = None,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Get user's documentation generation history.
-    
+
     Args:
         limit: Maximum number of records to return
+        fields: Pass "metadata" to return only list-view attributes instead
+                of full records with README content and summaries
         current_user: Authenticated user from JWT
-        
+
     Returns:
         List of documentation records
     """
     user_id = current_user.get('sub')
-    history = get_user_documentation_history(user_id, limit)
+    # Full records by default - the current frontend builds the docs view
+    # straight from this response. Clients that fetch full records per-item
+    # via /user/documentation/{record_id} can opt into ?fields=metadata
+    # to skip the README/summaries payloads.
+    history = await asyncio.to_thread(
+        get_user_documentation_history, user_id, limit,
+        metadata_only=(fields == "metadata")
+    )
     return {"history": history}
 
 
@@ -505,7 +526,7 @@ async def get_documentation(
         Documentation record
     """
     user_id = current_user.get('sub')
-    record = get_documentation_by_id(user_id, record_id)
+    record = await asyncio.to_thread(get_documentation_by_id, user_id, record_id)
     
     if not record:
         raise HTTPException(
@@ -532,7 +553,7 @@ async def delete_documentation(
         Dict with deletion status
     """
     user_id = current_user.get('sub')
-    result = delete_documentation_record(user_id, record_id)
+    result = await asyncio.to_thread(delete_documentation_record, user_id, record_id)
     return result
 
 
@@ -554,7 +575,7 @@ async def check_documentation_updates(
     user_id = current_user.get('sub')
     
     # Get the documentation record
-    record = get_documentation_by_id(user_id, record_id)
+    record = await asyncio.to_thread(get_documentation_by_id, user_id, record_id)
     
     if not record:
         raise HTTPException(
@@ -571,7 +592,7 @@ async def check_documentation_updates(
     
     # If updates found, mark the record
     if update_info.get('has_updates'):
-        mark_repo_has_updates(user_id, record_id)
+        await asyncio.to_thread(mark_repo_has_updates, user_id, record_id)
     
     return {
         'recordId': record_id,
@@ -598,7 +619,7 @@ async def regenerate_documentation(
     user_id = current_user.get('sub')
     
     # Get the existing documentation record
-    record = get_documentation_by_id(user_id, record_id)
+    record = await asyncio.to_thread(get_documentation_by_id, user_id, record_id)
     
     if not record:
         raise HTTPException(
@@ -624,10 +645,19 @@ async def regenerate_documentation(
             )
         )
         
-        result = run_pipeline(state)
-        
-        # Get latest commit info
-        commit_info = get_latest_commit_info(repo_url, branch)
+        # Prefetch commit metadata while the pipeline runs - the two only
+        # share the repo URL, so the network calls can overlap fully
+        commit_info_task = asyncio.create_task(
+            asyncio.to_thread(get_latest_commit_info, repo_url, branch)
+        )
+        try:
+            result = await run_pipeline(state)
+        except BaseException:
+            # Don't leave the prefetch orphaned when the pipeline fails -
+            # its exception would otherwise go unretrieved
+            commit_info_task.cancel()
+            raise
+        commit_info = await commit_info_task
         
         # Update metadata with new commit info
         metadata = {
@@ -642,7 +672,8 @@ async def regenerate_documentation(
         }
         
         # Update the existing record (reuse the same record_id)
-        save_result = save_documentation_record(
+        save_result = await asyncio.to_thread(
+            save_documentation_record,
             user_id=user_id,
             repo_url=repo_url,
             readme_content=result.get("readme", ""),
@@ -723,7 +754,22 @@ async def generate_docs(
                 visualize_structure=True
             ))
 
-        result = run_pipeline(state)
+        # Prefetch commit metadata concurrently with the pipeline; it is
+        # only consumed when saving the record afterwards
+        commit_info_task = None
+        if input_type == "url":
+            commit_info_task = asyncio.create_task(
+                asyncio.to_thread(get_latest_commit_info, input_data, branch or "main")
+            )
+
+        try:
+            result = await run_pipeline(state)
+        except BaseException:
+            # Don't leave the prefetch orphaned when the pipeline fails -
+            # its exception would otherwise go unretrieved
+            if commit_info_task is not None:
+                commit_info_task.cancel()
+            raise
     except ValueError as ve:
         # Handle branch not found and other validation errors
         error_message = str(ve)
@@ -774,10 +820,10 @@ async def generate_docs(
         user_id = current_user.get('sub')
         repo_identifier = input_data if input_type == "url" else "zip_upload"
         
-        # Get latest commit info for GitHub URLs
+        # Get latest commit info for GitHub URLs (prefetched above)
         commit_info = {}
-        if input_type == "url":
-            commit_info = get_latest_commit_info(repo_identifier, branch or "main")
+        if commit_info_task is not None:
+            commit_info = await commit_info_task
         
         metadata = {
             "visuals": result.get("visuals"),
@@ -793,9 +839,10 @@ async def generate_docs(
         # Check if this repo already exists for this user
         existing_record = None
         if input_type == "url":
-            existing_record = get_repo_by_url(user_id, repo_identifier)
+            existing_record = await asyncio.to_thread(get_repo_by_url, user_id, repo_identifier)
         
-        save_result = save_documentation_record(
+        save_result = await asyncio.to_thread(
+            save_documentation_record,
             user_id=user_id,
             repo_url=repo_identifier,
             readme_content=result.get("readme", ""),
@@ -821,7 +868,7 @@ async def generate_docs(
 
 @app.post("/download-zip")
 async def download_modified_zip(modified_files_json: str = Form(...)):
-    modified_files = json.loads(modified_files_json)
+    modified_files = json_loads(modified_files_json)
     zip_stream = io.BytesIO()
 
     with zipfile.ZipFile(zip_stream, "w", zipfile.ZIP_DEFLATED) as zf:
@@ -863,7 +910,7 @@ async def generate_and_download(
             visualize_structure=True
         ))
 
-    result = run_pipeline(state)
+    result = await run_pipeline(state)
     modified_files = result.get("modified_files", {})
     readme = result.get("readme")
 
@@ -2,6 +2,7 @@
 Test script to verify ZERO local storage mode.
 This will process a GitHub repo and verify no temp files are created.
 """
+import asyncio
 import os
 import tempfile
 from app.models.state import RepoXState, RepoXPreferences
@@ -39,7 +40,7 @@ def test_zero_storage():
     try:
         # Run pipeline
         print("\n🚀 Running pipeline...")
-        result = run_pipeline(state)
+        result = asyncio.run(run_pipeline(state))
         
         # Count temp files after
         after_count = count_temp_files_before()